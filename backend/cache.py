@@ -0,0 +1,105 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import hashlib
+
+from fastapi import Request, Response
+
+
+class CachedResponse:
+    """A serialized JSON body together with its ETag"""
+
+    def __init__(self, body: bytes, etag: Optional[str] = None):
+        self.body = body
+        self.etag = etag or '"%s"' % hashlib.sha1(body).hexdigest()
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+    def to_response(self, request: Request, cache_control: str = "no-cache") -> Response:
+        """Return the cached body, or 304 when the client already has this version"""
+        headers = {"ETag": self.etag, "Cache-Control": cache_control}
+        if etag_matches(request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+
+class VersionedCache:
+    """Holds one serialized value stamped with the state version it was built from"""
+
+    def __init__(self):
+        self.version: Optional[Any] = None
+        self.value: Optional[CachedResponse] = None
+
+    def get(self, version: Any) -> Optional[CachedResponse]:
+        if self.value is not None and self.version == version:
+            return self.value
+        return None
+
+    def put(self, version: Any, value: CachedResponse) -> CachedResponse:
+        self.version = version
+        self.value = value
+        return value
+
+    def clear(self):
+        self.version = None
+        self.value = None
+
+
+class LRUByteCache:
+    """LRU cache of serialized responses bounded by total body size in bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: CachedResponse) -> CachedResponse:
+        if value.size > self.max_bytes:
+            # Larger than the whole cache - serve it without storing
+            return value
+        if key in self.entries:
+            self.current_bytes -= self.entries.pop(key).size
+        self.entries[key] = value
+        self.current_bytes += value.size
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.current_bytes -= evicted.size
+            self.evictions += 1
+        return value
+
+    def clear(self):
+        self.entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -1,23 +1,34 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from startup import import_timer, lazy_import, mark_ready, startup_report, PROTOCOL_TABLES
+with import_timer("fastapi"):
+    from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query, Request, Response
+    from fastapi.middleware.cors import CORSMiddleware
+    from pydantic import BaseModel
 from typing import List, Dict, Optional, Any
 import asyncio
-import json
 import random
 import uuid
 from datetime import datetime
+from itertools import islice, cycle
+from math import gcd
 import logging
-import socketio
 import base64
-import hashlib
-from cryptography.fernet import Fernet
+with import_timer("socketio"):
+    import socketio
+with import_timer("backend_modules"):
+    from cache import CachedResponse, VersionedCache, LRUByteCache
+    from serialization import FastJSONResponse, PackedBits, SocketIOJSON, dumps as serialize_json, dumps_str, loads
+    from transmission import (BlockTransmission, DuplicateBlockError, TransmissionError, DEFAULT_WINDOW,
+                              check_photons)
+
+# Optional engines are imported on first use (see startup.py)
+numpy_protocol = lazy_import("numpy_protocol")
+shared_buffers = lazy_import("shared_buffers")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="BB84 QKD Demo API", version="1.0.0")
+app = FastAPI(title="BB84 QKD Demo API", version="1.0.0", default_response_class=FastJSONResponse)
 
 # CORS middleware for frontend communication
 app.add_middleware(
@@ -61,6 +72,8 @@ class BB84Session:
         self.qber = 0.0
         self.connected_users = {}
         self.messages = []
+        self.transmission = None
+        self.version = 0
         
     def reset(self):
         self.alice_data = UserData(user_id="alice", user_type="alice")
@@ -69,13 +82,34 @@ class BB84Session:
         self.phase = "idle"
         self.qber = 0.0
         self.messages = []
+        self.transmission = None
+        self.mark_changed()
+
+    def mark_changed(self):
+        """Bump the state version so cached views of the session are rebuilt"""
+        self.version += 1
 
 # Global session
 session = BB84Session()
 
+# Shared-memory process pool for large jobs, created on first use
+PARALLEL_ENGINE = "parallel"
+worker_pool = None
+
+def get_worker_pool():
+    global worker_pool
+    if worker_pool is None:
+        worker_pool = shared_buffers.ProtocolWorkerPool()
+    return worker_pool
+
+# Response caches
+SIMULATION_CACHE_MAX_BYTES = 64 * 1024 * 1024
+status_cache = VersionedCache()
+simulation_cache = LRUByteCache(SIMULATION_CACHE_MAX_BYTES)
+
 # Socket.IO server
-sio = socketio.AsyncServer(cors_allowed_origins="*", async_mode='asyncio')
-app.mount("/socket.io", socketio.ASGIApp(sio))
+sio = socketio.AsyncServer(cors_allowed_origins="*", async_mode='asgi', json=SocketIOJSON)
+app.mount("/socket.io", socketio.ASGIApp(sio, socketio_path=""))
 
 # WebSocket connection manager
 class ConnectionManager:
@@ -85,6 +119,7 @@ class ConnectionManager:
     async def connect(self, sid: str, user_id: str):
         self.active_connections[user_id] = sid
         session.connected_users[user_id] = True
+        session.mark_changed()
         logger.info(f"User {user_id} connected with sid {sid}")
 
     def disconnect(self, user_id: str):
@@ -92,6 +127,7 @@ class ConnectionManager:
             del self.active_connections[user_id]
         if user_id in session.connected_users:
             del session.connected_users[user_id]
+            session.mark_changed()
         logger.info(f"User {user_id} disconnected")
 
     async def send_personal_message(self, message: str, user_id: str):
@@ -133,7 +169,7 @@ async def join(sid, data):
 @sio.event
 async def message(sid, data):
     # Handle incoming messages from clients
-    message_data = json.loads(data) if isinstance(data, str) else data
+    message_data = loads(data) if isinstance(data, str) else data
     
     # Find user_id for this sid
     user_id = None
@@ -148,6 +184,8 @@ async def message(sid, data):
     # Handle different message types
     if message_data["type"] == "alice_send_photons":
         await handle_alice_send_photons(message_data["data"])
+    elif message_data["type"] == "alice_send_block":
+        await handle_alice_send_block(message_data["data"])
     elif message_data["type"] == "eve_intercept":
         await handle_eve_intercept(message_data["data"])
     elif message_data["type"] == "basis_comparison":
@@ -156,7 +194,7 @@ async def message(sid, data):
         await handle_send_message(message_data["data"])
     elif message_data["type"] == "session_reset":
         session.reset()
-        await manager.broadcast(json.dumps({
+        await manager.broadcast(dumps_str({
             "type": "session_reset",
             "data": {"phase": "idle"}
         }))
@@ -164,72 +202,67 @@ async def message(sid, data):
 # BB84 Protocol Implementation
 class BB84Protocol:
     @staticmethod
-    def generate_random_bits(n: int) -> List[int]:
+    def make_rng(seed: Optional[int] = None):
+        """Random source for a run; seeded runs get their own generator"""
+        return random.Random(seed) if seed is not None else random
+    
+    @staticmethod
+    def generate_random_bits(n: int, rng=random) -> List[int]:
         """Generate random bits (0 or 1)"""
-        return [random.randint(0, 1) for _ in range(n)]
+        return [rng.randint(0, 1) for _ in range(n)]
     
     @staticmethod
-    def generate_random_bases(n: int) -> List[int]:
+    def generate_random_bases(n: int, rng=random) -> List[int]:
         """Generate random bases (0 for rectilinear, 1 for diagonal)"""
-        return [random.randint(0, 1) for _ in range(n)]
+        return [rng.randint(0, 1) for _ in range(n)]
     
     @staticmethod
     def encode_photons(bits: List[int], bases: List[int]) -> List[int]:
         """Encode bits using BB84 bases"""
-        photons = []
-        for bit, base in zip(bits, bases):
-            if base == 0:  # Rectilinear basis
-                photons.append(bit)  # 0 -> |0⟩, 1 -> |1⟩
-            else:  # Diagonal basis
-                photons.append(bit + 2)  # 0 -> |+⟩, 1 -> |-⟩
-        return photons
+        # Rectilinear: 0 -> |0⟩, 1 -> |1⟩; diagonal: 0 -> |+⟩ (2), 1 -> |-⟩ (3)
+        encode = PROTOCOL_TABLES.encode
+        return [encode[base][bit] for bit, base in zip(bits, bases)]
     
     @staticmethod
-    def measure_photons(photons: List[int], measurement_bases: List[int]) -> List[int]:
+    def measure_photons(photons: List[int], measurement_bases: List[int], rng=random) -> List[int]:
         """Measure photons with given bases"""
+        # measure[basis][photon] is the bit read in the correct basis, -1 otherwise
+        measure = PROTOCOL_TABLES.measure
         results = []
         for photon, base in zip(photons, measurement_bases):
-            if base == 0:  # Rectilinear measurement
-                if photon in [0, 1]:  # Correct basis
-                    results.append(photon)
-                else:  # Wrong basis - random result
-                    results.append(random.randint(0, 1))
-            else:  # Diagonal measurement
-                if photon in [2, 3]:  # Correct basis
-                    results.append(photon - 2)
-                else:  # Wrong basis - random result
-                    results.append(random.randint(0, 1))
+            bit = measure[base][photon]
+            results.append(bit if bit >= 0 else rng.randint(0, 1))  # Wrong basis - random result
         return results
     
     @staticmethod
-    def simulate_eve_interception(photons: List[int], eve_prob: float) -> List[int]:
+    def simulate_eve_interception(photons: List[int], eve_prob: float, rng=random) -> List[int]:
         """Simulate Eve's intercept-resend attack"""
+        measure = PROTOCOL_TABLES.measure
+        encode = PROTOCOL_TABLES.encode
         intercepted_photons = []
         for photon in photons:
-            if random.random() < eve_prob:
+            if rng.random() < eve_prob:
                 # Eve intercepts and measures with random basis
-                eve_basis = random.randint(0, 1)
-                if eve_basis == 0:  # Rectilinear
-                    if photon in [0, 1]:
-                        measured_bit = photon
-                    else:
-                        measured_bit = random.randint(0, 1)
-                else:  # Diagonal
-                    if photon in [2, 3]:
-                        measured_bit = photon - 2
-                    else:
-                        measured_bit = random.randint(0, 1)
+                measured_bit = measure[rng.randint(0, 1)][photon]
+                if measured_bit < 0:
+                    measured_bit = rng.randint(0, 1)
                 
                 # Eve resends with random basis
-                resend_basis = random.randint(0, 1)
-                if resend_basis == 0:
-                    intercepted_photons.append(measured_bit)
-                else:
-                    intercepted_photons.append(measured_bit + 2)
+                intercepted_photons.append(encode[rng.randint(0, 1)][measured_bit])
             else:
                 intercepted_photons.append(photon)
         return intercepted_photons
     
+    @staticmethod
+    def match_bases(alice_bases: List[int], bob_bases: List[int]) -> List[int]:
+        """Indices where Alice and Bob used the same basis"""
+        return [i for i in range(len(alice_bases)) if alice_bases[i] == bob_bases[i]]
+    
+    @staticmethod
+    def sift_key(bits: List[int], matched_indices: List[int]) -> List[int]:
+        """Keep only the bits at matched indices"""
+        return [bits[i] for i in matched_indices]
+    
     @staticmethod
     def calculate_qber(alice_bits: List[int], bob_bits: List[int], matched_indices: List[int]) -> float:
         """Calculate Quantum Bit Error Rate"""
@@ -253,30 +286,31 @@ class BB84Protocol:
         else:  # High error rate - significant reduction
             return sifted_key[::3]  # Take every third bit
     
+    @staticmethod
+    def key_stream(key: List[int], length: int) -> bytes:
+        """Cycle the key bits into `length` bytes, first bit least significant"""
+        pack = PROTOCOL_TABLES.pack_lsb
+        # The byte pattern repeats once the key and byte boundaries line up again
+        period = len(key) // gcd(len(key), 8)
+        bits = cycle(key)
+        pattern = bytes(pack[tuple(islice(bits, 8))] for _ in range(min(period, length)))
+        return (pattern * (length // len(pattern) + 1))[:length] if pattern else b""
+    
+    @staticmethod
+    def xor_with_key(data: bytes, key: List[int]) -> bytes:
+        """XOR data with the cycled key stream"""
+        stream = BB84Protocol.key_stream(key, len(data))
+        xored = int.from_bytes(data, 'little') ^ int.from_bytes(stream, 'little')
+        return xored.to_bytes(len(data), 'little')
+    
     @staticmethod
     def encrypt_message_otp(message: str, key: List[int]) -> str:
         """Encrypt message using One-Time Pad with BB84 key"""
         if not key or len(key) == 0:
             return message
         
-        # Convert message to bytes
-        message_bytes = message.encode('utf-8')
-        encrypted_bytes = bytearray()
-        key_index = 0
-        
-        for byte in message_bytes:
-            # XOR each byte with key bits (cycling through key)
-            key_byte = 0
-            for bit_pos in range(8):
-                if key_index < len(key):
-                    key_byte |= (key[key_index] << bit_pos)
-                    key_index += 1
-                else:
-                    key_index = 0
-                    key_byte |= (key[key_index] << bit_pos)
-                    key_index += 1
-            
-            encrypted_bytes.append(byte ^ key_byte)
+        # XOR each byte with key bits (cycling through key)
+        encrypted_bytes = BB84Protocol.xor_with_key(message.encode('utf-8'), key)
         
         # Return base64 encoded result
         return base64.b64encode(encrypted_bytes).decode('utf-8')
@@ -290,96 +324,158 @@ class BB84Protocol:
         try:
             # Decode base64
             encrypted_bytes = base64.b64decode(encrypted_message.encode('utf-8'))
-            decrypted_bytes = bytearray()
-            key_index = 0
-            
-            for byte in encrypted_bytes:
-                # XOR each byte with key bits (cycling through key)
-                key_byte = 0
-                for bit_pos in range(8):
-                    if key_index < len(key):
-                        key_byte |= (key[key_index] << bit_pos)
-                        key_index += 1
-                    else:
-                        key_index = 0
-                        key_byte |= (key[key_index] << bit_pos)
-                        key_index += 1
-                
-                decrypted_bytes.append(byte ^ key_byte)
-            
+            decrypted_bytes = BB84Protocol.xor_with_key(encrypted_bytes, key)
             return decrypted_bytes.decode('utf-8')
         except Exception as e:
             logger.error(f"Decryption error: {e}")
             return encrypted_message
 
+# Largest /simulate run; bigger requests are rejected before anything is allocated
+MAX_SIMULATION_BITS = 10_000_000
+
+# Protocol implementations selectable via /simulate?engine=, resolved on first use
+SIMULATION_ENGINES = {
+    "python": lambda: BB84Protocol,
+    "numpy": lambda: numpy_protocol.NumpyBB84Protocol,
+}
+
+# Bit-valued fields of a simulation result, sent base64-packed with packed=true
+PACKABLE_FIELDS = ["alice_bits", "alice_bases", "bob_bases", "bob_measurements",
+                   "alice_sifted", "bob_sifted", "final_key"]
+
+def run_simulation(n_bits: int, eve_prob: float, rng=random, protocol=BB84Protocol,
+                   packed: bool = False) -> Dict[str, Any]:
+    """Run a full BB84 round and return the simulation result"""
+    # Generate Alice's data
+    alice_bits = protocol.generate_random_bits(n_bits, rng)
+    alice_bases = protocol.generate_random_bases(n_bits, rng)
+    alice_photons = protocol.encode_photons(alice_bits, alice_bases)
+    
+    # Simulate Eve's interception
+    intercepted_photons = protocol.simulate_eve_interception(alice_photons, eve_prob, rng)
+    
+    # Generate Bob's measurement bases
+    bob_bases = protocol.generate_random_bases(n_bits, rng)
+    bob_measurements = protocol.measure_photons(intercepted_photons, bob_bases, rng)
+    
+    # Find matching bases
+    matched_indices = protocol.match_bases(alice_bases, bob_bases)
+    
+    # Generate sifted keys
+    alice_sifted = protocol.sift_key(alice_bits, matched_indices)
+    bob_sifted = protocol.sift_key(bob_measurements, matched_indices)
+    
+    # Calculate QBER
+    qber = protocol.calculate_qber(alice_bits, bob_measurements, matched_indices)
+    
+    # Error correction
+    final_key = protocol.error_correction(alice_sifted, qber)
+    
+    result = {
+        "alice_bits": alice_bits,
+        "alice_bases": alice_bases,
+        "bob_bases": bob_bases,
+        "bob_measurements": bob_measurements,
+        "matched_indices": matched_indices,
+        "alice_sifted": alice_sifted,
+        "bob_sifted": bob_sifted,
+        "qber": qber,
+        "final_key": final_key,
+        "eve_intercepted": eve_prob > 0
+    }
+    return pack_bit_fields(result) if packed else result
+
+def pack_bit_fields(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace the bit-valued fields of a simulation result with PackedBits"""
+    for field in PACKABLE_FIELDS:
+        result[field] = PackedBits(result[field])
+    return result
+
+async def simulation_body(n_bits: int, eve_prob: float, seed: Optional[int], engine: str,
+                          packed: bool) -> bytes:
+    """Run a simulation with the chosen engine and serialize the result"""
+    if engine != PARALLEL_ENGINE:
+        protocol = SIMULATION_ENGINES[engine]()
+        return serialize_json(run_simulation(n_bits, eve_prob, protocol.make_rng(seed), protocol, packed))
+    
+    # Workers fill shared buffers in place; the result holds views that are
+    # serialized directly, then the buffers are released
+    pool = get_worker_pool()
+    owner = f"simulate-{uuid.uuid4()}"
+    try:
+        result = await pool.simulate(owner, n_bits, eve_prob, seed)
+        body = serialize_json(pack_bit_fields(result) if packed else result)
+        del result
+        return body
+    finally:
+        pool.release_owner(owner)
+
 # API Endpoints
 @app.get("/")
 async def root():
     return {"message": "BB84 QKD Demo API", "session_id": session.session_id}
 
 @app.get("/simulate")
-async def simulate_bb84(n_bits: int = 20, eve_prob: float = 0.2):
+async def simulate_bb84(request: Request, n_bits: int = Query(20, ge=0, le=MAX_SIMULATION_BITS),
+                        eve_prob: float = 0.2, seed: Optional[int] = None,
+                        engine: str = "python", packed: bool = False):
     """Simulate BB84 protocol"""
+    if engine not in SIMULATION_ENGINES and engine != PARALLEL_ENGINE:
+        raise HTTPException(status_code=400, detail=f"Unknown engine '{engine}'")
+    
     try:
-        # Generate Alice's data
-        alice_bits = BB84Protocol.generate_random_bits(n_bits)
-        alice_bases = BB84Protocol.generate_random_bases(n_bits)
-        alice_photons = BB84Protocol.encode_photons(alice_bits, alice_bases)
-        
-        # Simulate Eve's interception
-        intercepted_photons = BB84Protocol.simulate_eve_interception(alice_photons, eve_prob)
-        
-        # Generate Bob's measurement bases
-        bob_bases = BB84Protocol.generate_random_bases(n_bits)
-        bob_measurements = BB84Protocol.measure_photons(intercepted_photons, bob_bases)
-        
-        # Find matching bases
-        matched_indices = [i for i in range(n_bits) if alice_bases[i] == bob_bases[i]]
+        if seed is None:
+            body = await simulation_body(n_bits, eve_prob, None, engine, packed)
+            return Response(content=body, media_type="application/json")
         
-        # Generate sifted keys
-        alice_sifted = [alice_bits[i] for i in matched_indices]
-        bob_sifted = [bob_measurements[i] for i in matched_indices]
-        
-        # Calculate QBER
-        qber = BB84Protocol.calculate_qber(alice_bits, bob_measurements, matched_indices)
-        
-        # Error correction
-        final_key = BB84Protocol.error_correction(alice_sifted, qber)
-        
-        return {
-            "alice_bits": alice_bits,
-            "alice_bases": alice_bases,
-            "bob_bases": bob_bases,
-            "bob_measurements": bob_measurements,
-            "matched_indices": matched_indices,
-            "alice_sifted": alice_sifted,
-            "bob_sifted": bob_sifted,
-            "qber": qber,
-            "final_key": final_key,
-            "eve_intercepted": eve_prob > 0
-        }
+        # Seeded runs are deterministic, so their serialized result is cached
+        cache_key = (n_bits, eve_prob, seed, engine, packed)
+        cached = simulation_cache.get(cache_key)
+        if cached is None:
+            body = await simulation_body(n_bits, eve_prob, seed, engine, packed)
+            cached = simulation_cache.put(cache_key, CachedResponse(body))
+        return cached.to_response(request, cache_control="public, max-age=3600")
     except Exception as e:
         logger.error(f"Simulation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/session/status")
-async def get_session_status():
+async def get_session_status(request: Request):
     """Get current session status"""
+    cached = status_cache.get(session.version)
+    if cached is None:
+        status = {
+            "session_id": session.session_id,
+            "phase": session.phase,
+            "qber": session.qber,
+            "connected_users": list(session.connected_users.keys()),
+            "alice_data": session.alice_data.dict(),
+            "bob_data": session.bob_data.dict(),
+            "eve_data": session.eve_data.dict()
+        }
+        etag = f'"{session.session_id}-{session.version}"'
+        cached = status_cache.put(session.version, CachedResponse(serialize_json(status), etag))
+    return cached.to_response(request)
+
+@app.get("/startup")
+async def get_startup_report():
+    """Get the import-time breakdown of this worker"""
+    return startup_report()
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Get simulation cache and shared buffer statistics"""
     return {
-        "session_id": session.session_id,
-        "phase": session.phase,
-        "qber": session.qber,
-        "connected_users": list(session.connected_users.keys()),
-        "alice_data": session.alice_data.dict(),
-        "bob_data": session.bob_data.dict(),
-        "eve_data": session.eve_data.dict()
+        "simulation": simulation_cache.stats(),
+        "shared_buffers": worker_pool.buffers.stats() if worker_pool is not None else None,
+        "session_version": session.version
     }
 
 @app.post("/session/reset")
 async def reset_session():
     """Reset the current session"""
     session.reset()
-    await manager.broadcast(json.dumps({
+    await manager.broadcast(dumps_str({
         "type": "session_reset",
         "data": {"phase": "idle"}
     }))
@@ -389,7 +485,7 @@ async def reset_session():
 async def send_message(message: Message):
     """Send a message in the session"""
     session.messages.append(message)
-    await manager.broadcast(json.dumps({
+    await manager.broadcast(dumps_str({
         "type": "new_message",
         "data": message.dict()
     }))
@@ -404,20 +500,33 @@ async def get_messages():
 @app.websocket("/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
     await websocket.accept()
-    await websocket.send_text(json.dumps({"type": "connected", "user_id": user_id}))
+    await websocket.send_text(dumps_str({"type": "connected", "user_id": user_id}))
 
 async def handle_alice_send_photons(data):
     """Handle Alice sending photons"""
+    try:
+        eve_prob = check_photons(data.get("bits"), data.get("bases"), data.get("eve_prob", 0.2))
+    except TransmissionError as e:
+        logger.warning(f"Rejected photons from alice: {e}")
+        await manager.send_personal_message(dumps_str({
+            "type": "photons_rejected",
+            "data": {"reason": str(e)}
+        }), "alice")
+        return
+    
     session.phase = "photon_transmission"
+    session.transmission = None
     session.alice_data.bits = data["bits"]
     session.alice_data.bases = data["bases"]
     
     # Simulate photon transmission with Eve interception
     photons = BB84Protocol.encode_photons(data["bits"], data["bases"])
-    intercepted_photons = BB84Protocol.simulate_eve_interception(photons, data.get("eve_prob", 0.2))
+    intercepted_photons = BB84Protocol.simulate_eve_interception(photons, eve_prob)
+    
+    session.mark_changed()
     
     # Send to Bob
-    await manager.broadcast(json.dumps({
+    await manager.broadcast(dumps_str({
         "type": "photons_received",
         "data": {
             "photons": intercepted_photons,
@@ -425,25 +534,92 @@ async def handle_alice_send_photons(data):
         }
     }), exclude_user="alice")
 
+async def handle_alice_send_block(data):
+    """Handle Alice sending one block of an incremental transmission"""
+    # Session state is only touched once the block has been accepted
+    transmission = session.transmission
+    try:
+        if transmission is None:
+            transmission = BlockTransmission(window=data.get("window", DEFAULT_WINDOW))
+        accepted = transmission.accept(data.get("seq"), data.get("bits"), data.get("bases"),
+                                       data.get("eve_prob", 0.2))
+    except DuplicateBlockError as e:
+        # Already queued, in flight or sifted - tells Alice it was not lost
+        await send_block_rejected(data.get("seq"), str(e), duplicate=True)
+        return
+    except TransmissionError as e:
+        await send_block_rejected(data.get("seq"), str(e))
+        return
+    
+    if session.transmission is None:
+        # First block of a new transmission replaces the previous round's data
+        session.transmission = transmission
+        session.alice_data.bits, session.alice_data.bases = [], []
+        session.bob_data.bases, session.bob_data.measurements = [], []
+        for user in (session.alice_data, session.bob_data):
+            user.sifted_key, user.final_key = [], []
+        session.qber = 0.0
+    session.phase = "photon_transmission"
+    for block in accepted:
+        session.alice_data.bits.extend(block.bits)
+        session.alice_data.bases.extend(block.bases)
+    session.mark_changed()
+    
+    await forward_photon_blocks()
+
+async def forward_photon_blocks():
+    """Send queued blocks to Bob while the flow-control window has room"""
+    transmission = session.transmission
+    for block in transmission.release():
+        # Photons are encoded and exposed to Eve as they go on the wire
+        photons = BB84Protocol.encode_photons(block.bits, block.bases)
+        block.photons = BB84Protocol.simulate_eve_interception(photons, block.eve_prob)
+        await manager.broadcast(dumps_str({
+            "type": "photon_block",
+            "data": {
+                "seq": block.seq,
+                "offset": block.offset,
+                "photons": block.photons,
+                "phase": "photon_transmission"
+            }
+        }), exclude_user="alice")
+
+async def send_block_rejected(seq, reason: str, duplicate: bool = False, user_id: str = "alice"):
+    logger.warning(f"Rejected photon block {seq} from {user_id}: {reason}")
+    transmission = session.transmission
+    await manager.send_personal_message(dumps_str({
+        "type": "block_rejected",
+        "data": {
+            "seq": seq,
+            "reason": reason,
+            "duplicate": duplicate,
+            "next_seq": transmission.next_seq if transmission is not None else 0
+        }
+    }), user_id)
+
 async def handle_eve_intercept(data):
     """Handle Eve's interception"""
     session.eve_data.bits = data.get("bits")
     session.eve_data.bases = data.get("bases")
     
-    await manager.broadcast(json.dumps({
+    session.mark_changed()
+    await manager.broadcast(dumps_str({
         "type": "eve_intercepted",
         "data": data
     }))
 
 async def handle_basis_comparison(data):
     """Handle basis comparison phase"""
+    if "seq" in data:
+        await handle_block_comparison(data)
+        return
+    
     session.phase = "basis_comparison"
     session.bob_data.bases = data["bob_bases"]
     session.bob_data.measurements = data["bob_measurements"]
     
     # Find matching bases
-    matched_indices = [i for i in range(len(session.alice_data.bases)) 
-                      if session.alice_data.bases[i] == session.bob_data.bases[i]]
+    matched_indices = BB84Protocol.match_bases(session.alice_data.bases, session.bob_data.bases)
     
     # Calculate QBER
     qber = BB84Protocol.calculate_qber(
@@ -454,15 +630,16 @@ async def handle_basis_comparison(data):
     session.qber = qber
     
     # Generate sifted keys
-    session.alice_data.sifted_key = [session.alice_data.bits[i] for i in matched_indices]
-    session.bob_data.sifted_key = [session.bob_data.measurements[i] for i in matched_indices]
+    session.alice_data.sifted_key = BB84Protocol.sift_key(session.alice_data.bits, matched_indices)
+    session.bob_data.sifted_key = BB84Protocol.sift_key(session.bob_data.measurements, matched_indices)
     
     # Error correction
     final_key = BB84Protocol.error_correction(session.alice_data.sifted_key, qber)
     session.alice_data.final_key = final_key
     session.bob_data.final_key = final_key
     
-    await manager.broadcast(json.dumps({
+    session.mark_changed()
+    await manager.broadcast(dumps_str({
         "type": "basis_comparison_complete",
         "data": {
             "matched_indices": matched_indices,
@@ -473,6 +650,64 @@ async def handle_basis_comparison(data):
         }
     }))
 
+async def handle_block_comparison(data):
+    """Sift one acknowledged block and append it to the running keys"""
+    transmission = session.transmission
+    if transmission is None:
+        await send_block_rejected(data.get("seq"), "no block transmission in progress", user_id="bob")
+        return
+    try:
+        block = transmission.acknowledge(data.get("seq"), data.get("bob_bases"), data.get("bob_measurements"))
+    except TransmissionError as e:
+        await send_block_rejected(data.get("seq"), str(e), user_id="bob")
+        return
+    
+    session.phase = "basis_comparison"
+    bob_bases = data["bob_bases"]
+    bob_measurements = data["bob_measurements"]
+    session.bob_data.bases.extend(bob_bases)
+    session.bob_data.measurements.extend(bob_measurements)
+    
+    # Sift this block only; QBER is tracked over everything sifted so far
+    matched_indices = BB84Protocol.match_bases(block.bases, bob_bases)
+    alice_sifted = BB84Protocol.sift_key(block.bits, matched_indices)
+    bob_sifted = BB84Protocol.sift_key(bob_measurements, matched_indices)
+    errors = sum(1 for a, b in zip(alice_sifted, bob_sifted) if a != b)
+    qber = transmission.record_sift(len(matched_indices), errors)
+    session.qber = qber
+    
+    final_bits = BB84Protocol.error_correction(alice_sifted, qber)
+    session.alice_data.sifted_key.extend(alice_sifted)
+    session.bob_data.sifted_key.extend(bob_sifted)
+    session.alice_data.final_key.extend(final_bits)
+    session.bob_data.final_key = session.alice_data.final_key
+    session.phase = "key_generation"
+    session.mark_changed()
+    
+    await manager.broadcast(dumps_str({
+        "type": "block_sifted",
+        "data": {
+            "seq": block.seq,
+            "matched_indices": [block.offset + i for i in matched_indices],
+            "sifted_key": alice_sifted,
+            "final_key_bits": final_bits,
+            "key_length": len(session.alice_data.final_key),
+            "qber": qber,
+            "phase": "key_generation"
+        }
+    }))
+    await manager.send_personal_message(dumps_str({
+        "type": "block_ack",
+        "data": {
+            "seq": block.seq,
+            "next_seq": transmission.next_seq,
+            "in_flight": len(transmission.in_flight),
+            "capacity": transmission.capacity
+        }
+    }), "alice")
+    
+    await forward_photon_blocks()
+
 async def handle_send_message(data):
     """Handle sending encrypted message"""
     message_id = str(uuid.uuid4())
@@ -505,8 +740,10 @@ async def handle_send_message(data):
     )
     session.messages.append(message)
     
+    session.mark_changed()
+    
     # Broadcast to all connected users
-    await manager.broadcast(json.dumps({
+    await manager.broadcast(dumps_str({
         "type": "new_message",
         "data": {
             "sender": message.sender,
@@ -518,6 +755,9 @@ async def handle_send_message(data):
         }
     }))
 
+mark_ready()
+logger.info(f"Startup report: {startup_report()}")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,443 @@
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from numpy_protocol import NumpyBB84Protocol
+
+# Rounds whose QBER exceeds this are discarded. 11% is the usual BB84 security bound; this
+# repo's Eve resends in a random basis, which shows up as ~37.5% QBER at eve_prob=1
+MAX_QBER = 0.11
+# Secret bits a link buffer holds before newly distilled key is dropped
+DEFAULT_BUFFER_BITS = 1 << 20
+DEFAULT_PULSES = 100_000
+
+LinkId = Tuple[str, str]
+
+TOPOLOGIES = ["line", "ring", "star", "grid", "mesh"]
+
+
+def link_id(a: str, b: str) -> LinkId:
+    """Links are undirected; both ends name them the same way"""
+    return (a, b) if a <= b else (b, a)
+
+
+class Link:
+    """A point-to-point BB84 link between two trusted nodes"""
+
+    def __init__(self, a: str, b: str, loss: float = 0.0, eve_prob: float = 0.0,
+                 pulses: int = DEFAULT_PULSES):
+        if not 0.0 <= loss < 1.0:
+            raise ValueError("loss must be in [0, 1)")
+        self.id = link_id(a, b)
+        self.loss = loss
+        self.eve_prob = eve_prob
+        self.pulses = pulses
+
+    def __repr__(self):
+        return f"Link({self.id[0]}-{self.id[1]}, loss={self.loss}, eve_prob={self.eve_prob})"
+
+
+class KeyBuffer:
+    """Secret bits shared by the two ends of a link, consumed first in first out
+
+    Each end keeps its own copy: row 0 is held by the link's first node
+    (`link_id(a, b)[0]`), row 1 by the second. The copies only differ where
+    error correction left errors in.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_BUFFER_BITS):
+        self.capacity = capacity
+        self.chunks: deque = deque()
+        self.available = 0
+        self.deposited = 0
+        self.consumed = 0
+        self.dropped = 0
+
+    def deposit(self, bits: np.ndarray, peer_bits: Optional[np.ndarray] = None):
+        """Add key held as `bits` by the first node and `peer_bits` by the second (default: the same)"""
+        if peer_bits is not None and len(peer_bits) != len(bits):
+            raise ValueError("both ends must deposit the same number of key bits")
+        ends = np.stack([bits, bits if peer_bits is None else peer_bits])
+        room = self.capacity - self.available
+        if ends.shape[1] > room:
+            self.dropped += ends.shape[1] - room
+            ends = ends[:, :room]
+        if ends.shape[1]:
+            self.chunks.append(ends)
+            self.available += ends.shape[1]
+            self.deposited += ends.shape[1]
+
+    def withdraw(self, n: int) -> np.ndarray:
+        """The next n key bits as a (2, n) array, one row per end"""
+        if n > self.available:
+            raise ValueError(f"only {self.available} key bits buffered, {n} requested")
+        parts, needed = [], n
+        while needed:
+            chunk = self.chunks[0]
+            if chunk.shape[1] <= needed:
+                parts.append(self.chunks.popleft())
+                needed -= chunk.shape[1]
+            else:
+                parts.append(chunk[:, :needed])
+                self.chunks[0] = chunk[:, needed:]
+                needed = 0
+        self.available -= n
+        self.consumed += n
+        return np.concatenate(parts, axis=1) if parts else np.zeros((2, 0), dtype=np.uint8)
+
+
+class QKDNetwork:
+    """Trusted nodes connected by BB84 links"""
+
+    def __init__(self):
+        self.nodes: List[str] = []
+        self.links: Dict[LinkId, Link] = {}
+        self.adjacency: Dict[str, List[str]] = {}
+
+    def add_node(self, node: str):
+        if node not in self.adjacency:
+            self.nodes.append(node)
+            self.adjacency[node] = []
+
+    def add_link(self, a: str, b: str, **params) -> Link:
+        if a == b:
+            raise ValueError("a link needs two different nodes")
+        self.add_node(a)
+        self.add_node(b)
+        link = Link(a, b, **params)
+        if link.id not in self.links:
+            self.adjacency[a].append(b)
+            self.adjacency[b].append(a)
+        self.links[link.id] = link
+        return link
+
+    def shortest_path(self, src: str, dst: str,
+                      usable: Callable[[LinkId], bool] = lambda link: True) -> Optional[List[str]]:
+        """Fewest-hop path over usable links (BFS), or None when unreachable"""
+        previous = {src: None}
+        queue = deque([src])
+        while queue:
+            node = queue.popleft()
+            if node == dst:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = previous[node]
+                return path[::-1]
+            for neighbor in self.adjacency[node]:
+                if neighbor not in previous and usable(link_id(node, neighbor)):
+                    previous[neighbor] = node
+                    queue.append(neighbor)
+        return None
+
+
+def build_topology(kind: str, n_nodes: int, loss: float = 0.0, eve_prob: float = 0.0,
+                   eve_fraction: float = 0.0, pulses: int = DEFAULT_PULSES,
+                   seed: Optional[int] = None) -> QKDNetwork:
+    """Build a line, ring, star, grid or mesh network; a seeded fraction of links is tapped by Eve"""
+    if n_nodes < 2:
+        raise ValueError("a network needs at least 2 nodes")
+    nodes = [f"n{i}" for i in range(n_nodes)]
+    if kind == "line":
+        edges = list(zip(nodes, nodes[1:]))
+    elif kind == "ring":
+        edges = list(zip(nodes, nodes[1:] + nodes[:1])) if n_nodes > 2 else [(nodes[0], nodes[1])]
+    elif kind == "star":
+        edges = [(nodes[0], node) for node in nodes[1:]]
+    elif kind == "grid":
+        width = int(np.ceil(np.sqrt(n_nodes)))
+        edges = [(nodes[i], nodes[i + 1]) for i in range(n_nodes - 1) if (i + 1) % width]
+        edges += [(nodes[i], nodes[i + width]) for i in range(n_nodes - width)]
+    elif kind == "mesh":
+        edges = [(a, b) for i, a in enumerate(nodes) for b in nodes[i + 1:]]
+    else:
+        raise ValueError(f"Unknown topology '{kind}' (available: {', '.join(TOPOLOGIES)})")
+
+    rng = np.random.default_rng(seed)
+    tapped = set(rng.choice(len(edges), size=int(round(eve_fraction * len(edges))), replace=False).tolist())
+    network = QKDNetwork()
+    for node in nodes:
+        network.add_node(node)
+    for index, (a, b) in enumerate(edges):
+        network.add_link(a, b, loss=loss, eve_prob=eve_prob if index in tapped else 0.0, pulses=pulses)
+    return network
+
+
+def run_link_round(pulses: int, loss: float, eve_prob: float,
+                   seed: np.random.SeedSequence) -> Dict[str, Any]:
+    """Worker job: one BB84 round on a lossy link
+
+    Returns the distilled key as Alice (the link's first node) and Bob hold
+    it, and the QBER.
+    """
+    protocol = NumpyBB84Protocol
+    rng = np.random.default_rng(seed)
+    alice_bits = protocol.generate_random_bits(pulses, rng)
+    alice_bases = protocol.generate_random_bases(pulses, rng)
+    photons = protocol.simulate_eve_interception(protocol.encode_photons(alice_bits, alice_bases), eve_prob, rng)
+
+    # Lost photons never reach Bob's detector, so they are dropped before sifting
+    detected = np.flatnonzero(rng.random(pulses) >= loss)
+    alice_bits, alice_bases, photons = alice_bits[detected], alice_bases[detected], photons[detected]
+
+    bob_bases = protocol.generate_random_bases(len(photons), rng)
+    bob_measurements = protocol.measure_photons(photons, bob_bases, rng)
+    matched_indices = protocol.match_bases(alice_bases, bob_bases)
+    qber = protocol.calculate_qber(alice_bits, bob_measurements, matched_indices)
+    key = protocol.error_correction(protocol.sift_key(alice_bits, matched_indices), qber)
+    peer_key = protocol.error_correction(protocol.sift_key(bob_measurements, matched_indices), qber)
+    if qber > MAX_QBER:
+        key, peer_key = key[:0], peer_key[:0]
+    return {
+        "detected": len(detected),
+        "sifted": len(matched_indices),
+        "qber": qber,
+        "key": key,
+        "peer_key": peer_key,
+    }
+
+
+def relay_key(buffers: Dict[LinkId, KeyBuffer], path: List[str], n_bits: int,
+              rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Deliver an n-bit key along path by hop-by-hop XOR forwarding through trusted relays
+
+    The source one-time-pads a fresh key with its first link key; each relay
+    decrypts with the incoming link key and re-encrypts with the outgoing one.
+    Every node uses its own copy of a link key, so bit errors left on a link
+    reach the destination. Returns (key at the source, key recovered at the destination).
+    """
+    # (copy at the sending node, copy at the receiving node) for every hop
+    hop_keys = []
+    for a, b in zip(path, path[1:]):
+        ends = buffers[link_id(a, b)].withdraw(n_bits)
+        hop_keys.append((ends[0], ends[1]) if link_id(a, b) == (a, b) else (ends[1], ends[0]))
+    key = rng.integers(0, 2, size=n_bits, dtype=np.uint8)
+    ciphertext = key ^ hop_keys[0][0]
+    for (_, incoming), (outgoing, _) in zip(hop_keys, hop_keys[1:]):
+        ciphertext = (ciphertext ^ incoming) ^ outgoing
+    return key, ciphertext ^ hop_keys[-1][1]
+
+
+class Demand:
+    """End-to-end key requested between two nodes, in bits per round"""
+
+    def __init__(self, src: str, dst: str, bits_per_round: int):
+        self.src = src
+        self.dst = dst
+        self.bits_per_round = bits_per_round
+        self.backlog = 0
+        self.delivered = 0
+        # Delivered bits on which source and destination disagree
+        self.bit_errors = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.src}->{self.dst}"
+
+
+def random_demands(network: QKDNetwork, count: int, bits_per_round: int,
+                   seed: Optional[int] = None) -> List[Demand]:
+    """Demands between distinct random node pairs"""
+    rng = np.random.default_rng(seed)
+    demands = []
+    for _ in range(count):
+        src, dst = rng.choice(len(network.nodes), size=2, replace=False)
+        demands.append(Demand(network.nodes[src], network.nodes[dst], bits_per_round))
+    return demands
+
+
+def allocate_by_demand(requests: Dict[int, int], paths: Dict[int, List[LinkId]],
+                       available: Dict[LinkId, int]) -> Dict[int, int]:
+    """Demand-weighted max-min fair share of the buffered key on each link
+
+    Progressive filling: every unsatisfied demand grows in proportion to
+    what it asked for until it is satisfied or one of its links runs out,
+    at which point the other demands keep growing.
+    """
+    remaining = dict(available)
+    grants = {index: 0.0 for index in requests}
+    active = {index for index, requested in requests.items() if requested > 0 and paths.get(index)}
+    while active:
+        load: Dict[LinkId, float] = {}
+        for index in active:
+            for link in paths[index]:
+                load[link] = load.get(link, 0.0) + requests[index]
+        link_steps = {link: remaining[link] / weight for link, weight in load.items()}
+        demand_steps = {index: (requests[index] - grants[index]) / requests[index] for index in active}
+        step = min(min(link_steps.values()), min(demand_steps.values()))
+        for index in active:
+            grants[index] += step * requests[index]
+        for link, weight in load.items():
+            remaining[link] -= step * weight
+        # Compare step sizes rather than leftovers so rounding cannot stall the loop
+        saturated = {link for link, link_step in link_steps.items() if link_step <= step}
+        active = {index for index in active
+                  if demand_steps[index] > step and not saturated.intersection(paths[index])}
+    return {index: int(grant) for index, grant in grants.items()}
+
+
+class NetworkSimulator:
+    """Runs BB84 on every link concurrently and serves end-to-end demands from the link buffers
+
+    Each round every link distils key in a worker process; the scheduler
+    then splits the buffered key among the demands (including unserved
+    backlog) and relays it over the fewest-hop path of links whose last
+    round was not aborted. run() may be called repeatedly; close() (or a
+    `with` block) shuts down a pool the simulator started itself.
+    """
+
+    def __init__(self, network: QKDNetwork, demands: List[Demand], seed: Optional[int] = None,
+                 buffer_bits: int = DEFAULT_BUFFER_BITS, executor: Optional[Executor] = None,
+                 workers: Optional[int] = None):
+        self.network = network
+        self.demands = demands
+        self.buffers = {link: KeyBuffer(buffer_bits) for link in network.links}
+        self.compromised = set()
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed_sequence.spawn(1)[0])
+        self._own_executor = executor is None
+        self.executor = executor or ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn"))
+        self.rounds: List[Dict[str, Any]] = []
+        self.link_stats = {link: {"sifted": 0, "qber": 0.0, "aborted": 0} for link in network.links}
+        self.elapsed = 0.0
+
+    async def generate_keys(self) -> float:
+        """One BB84 round on every link in parallel; returns the wall time"""
+        start = time.perf_counter()
+        links = list(self.network.links.values())
+        seeds = self.seed_sequence.spawn(len(links))
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(self.executor, run_link_round, link.pulses, link.loss, link.eve_prob, seed)
+            for link, seed in zip(links, seeds)
+        ])
+        for link, result in zip(links, results):
+            stats = self.link_stats[link.id]
+            stats["sifted"] += result["sifted"]
+            stats["qber"] = result["qber"]
+            if result["qber"] > MAX_QBER:
+                stats["aborted"] += 1
+                self.compromised.add(link.id)
+            else:
+                self.compromised.discard(link.id)
+            self.buffers[link.id].deposit(result["key"], result["peer_key"])
+        return time.perf_counter() - start
+
+    def serve_demands(self) -> Dict[str, int]:
+        """Allocate buffered key to demands and relay it end to end"""
+        usable = lambda link: link not in self.compromised
+        node_paths = {index: self.network.shortest_path(demand.src, demand.dst, usable)
+                      for index, demand in enumerate(self.demands)}
+        paths = {index: [link_id(a, b) for a, b in zip(path, path[1:])]
+                 for index, path in node_paths.items() if path}
+        for demand in self.demands:
+            demand.backlog += demand.bits_per_round
+        requests = {index: demand.backlog for index, demand in enumerate(self.demands)}
+        available = {link: buffer.available for link, buffer in self.buffers.items()}
+        grants = allocate_by_demand(requests, paths, available)
+
+        delivered = {}
+        for index, bits in grants.items():
+            demand = self.demands[index]
+            if bits:
+                sent, received = relay_key(self.buffers, node_paths[index], bits, self.rng)
+                demand.bit_errors += int(np.count_nonzero(sent != received))
+                demand.backlog -= bits
+                demand.delivered += bits
+            delivered[demand.name] = bits
+        return delivered
+
+    async def run(self, rounds: int) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            for _ in range(rounds):
+                generate_seconds = await self.generate_keys()
+                delivered = self.serve_demands()
+                self.rounds.append({
+                    "generate_s": round(generate_seconds, 4),
+                    "delivered_bits": sum(delivered.values()),
+                    "compromised_links": len(self.compromised),
+                })
+        finally:
+            self.elapsed += time.perf_counter() - start
+        return self.report()
+
+    def close(self):
+        """Shut down the worker pool if the simulator started it"""
+        if self._own_executor:
+            self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def report(self) -> Dict[str, Any]:
+        generated = sum(buffer.deposited for buffer in self.buffers.values())
+        delivered = sum(demand.delivered for demand in self.demands)
+        requested = sum(demand.bits_per_round for demand in self.demands) * len(self.rounds)
+        elapsed = max(self.elapsed, 1e-9)
+        return {
+            "nodes": len(self.network.nodes),
+            "links": len(self.network.links),
+            "demands": len(self.demands),
+            "rounds": len(self.rounds),
+            "elapsed_s": round(self.elapsed, 4),
+            "link_key_bits": generated,
+            "link_key_bits_per_s": round(generated / elapsed, 1),
+            "delivered_bits": delivered,
+            "delivered_bits_per_s": round(delivered / elapsed, 1),
+            "delivered_bits_per_round": round(delivered / len(self.rounds), 1) if self.rounds else 0.0,
+            "demand_satisfaction": round(delivered / requested, 4) if requested else 1.0,
+            "key_bit_errors": sum(demand.bit_errors for demand in self.demands),
+            "aborted_link_rounds": sum(stats["aborted"] for stats in self.link_stats.values()),
+            "per_demand": {demand.name: {"delivered": demand.delivered, "backlog": demand.backlog,
+                                         "bit_errors": demand.bit_errors}
+                           for demand in self.demands},
+            "per_link": {f"{a}-{b}": {"buffered": self.buffers[(a, b)].available,
+                                      "consumed": self.buffers[(a, b)].consumed,
+                                      "dropped": self.buffers[(a, b)].dropped,
+                                      "last_qber": round(stats["qber"], 4),
+                                      "aborted": stats["aborted"]}
+                         for (a, b), stats in self.link_stats.items()},
+            "round_log": self.rounds,
+        }
+
+
+async def warm_up(executor: Executor, workers: Optional[int] = None):
+    """Start the worker processes with a trivial round so timings exclude spawning"""
+    loop = asyncio.get_running_loop()
+    seeds = np.random.SeedSequence(0).spawn(workers or os.cpu_count() or 1)
+    await asyncio.gather(*[loop.run_in_executor(executor, run_link_round, 1, 0.0, 0.0, seed) for seed in seeds])
+
+
+async def scaling_study(kind: str, node_counts: List[int], rounds: int, demand_bits: int,
+                        demands_per_node: float = 1.0, seed: Optional[int] = None,
+                        executor: Optional[Executor] = None, **link_params) -> List[Dict[str, Any]]:
+    """Run the same workload on growing networks; one report per node count"""
+    # One pool for every size, so process start-up is not counted against the first run
+    own_executor = executor is None
+    executor = executor or ProcessPoolExecutor(
+        max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn"))
+    reports = []
+    try:
+        await warm_up(executor)
+        for n_nodes in node_counts:
+            network = build_topology(kind, n_nodes, seed=seed, **link_params)
+            demands = random_demands(network, max(1, int(round(demands_per_node * n_nodes))), demand_bits, seed)
+            simulator = NetworkSimulator(network, demands, seed=seed, executor=executor)
+            report = await simulator.run(rounds)
+            report["topology"] = kind
+            reports.append(report)
+    finally:
+        if own_executor:
+            executor.shutdown()
+    return reports
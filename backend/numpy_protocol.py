@@ -0,0 +1,76 @@
+from typing import Optional
+import numpy as np
+
+
+class NumpyBB84Protocol:
+    """Vectorized BB84 stages operating on uint8 NumPy arrays
+
+    Mirrors BB84Protocol: photons are 0/1 (rectilinear) and 2/3 (diagonal),
+    and every method takes a numpy Generator in place of the random module.
+    """
+
+    @staticmethod
+    def make_rng(seed: Optional[int] = None) -> np.random.Generator:
+        return np.random.default_rng(seed)
+
+    @staticmethod
+    def generate_random_bits(n: int, rng: np.random.Generator) -> np.ndarray:
+        """Generate random bits (0 or 1)"""
+        return rng.integers(0, 2, size=n, dtype=np.uint8)
+
+    @staticmethod
+    def generate_random_bases(n: int, rng: np.random.Generator) -> np.ndarray:
+        """Generate random bases (0 for rectilinear, 1 for diagonal)"""
+        return rng.integers(0, 2, size=n, dtype=np.uint8)
+
+    @staticmethod
+    def encode_photons(bits: np.ndarray, bases: np.ndarray) -> np.ndarray:
+        """Encode bits using BB84 bases"""
+        return bits + 2 * bases
+
+    @staticmethod
+    def measure_photons(photons: np.ndarray, measurement_bases: np.ndarray,
+                        rng: np.random.Generator) -> np.ndarray:
+        """Measure photons with given bases"""
+        correct_basis = (photons >> 1) == measurement_bases
+        random_bits = rng.integers(0, 2, size=len(photons), dtype=np.uint8)
+        return np.where(correct_basis, photons & 1, random_bits).astype(np.uint8)
+
+    @staticmethod
+    def simulate_eve_interception(photons: np.ndarray, eve_prob: float,
+                                  rng: np.random.Generator) -> np.ndarray:
+        """Simulate Eve's intercept-resend attack"""
+        n = len(photons)
+        intercepted = rng.random(n) < eve_prob
+        eve_bases = rng.integers(0, 2, size=n, dtype=np.uint8)
+        measured = NumpyBB84Protocol.measure_photons(photons, eve_bases, rng)
+        resend_bases = rng.integers(0, 2, size=n, dtype=np.uint8)
+        return np.where(intercepted, measured + 2 * resend_bases, photons).astype(np.uint8)
+
+    @staticmethod
+    def match_bases(alice_bases: np.ndarray, bob_bases: np.ndarray) -> np.ndarray:
+        """Indices where Alice and Bob used the same basis"""
+        return np.flatnonzero(alice_bases == bob_bases)
+
+    @staticmethod
+    def sift_key(bits: np.ndarray, matched_indices: np.ndarray) -> np.ndarray:
+        """Keep only the bits at matched indices"""
+        return bits[matched_indices]
+
+    @staticmethod
+    def calculate_qber(alice_bits: np.ndarray, bob_bits: np.ndarray, matched_indices: np.ndarray) -> float:
+        """Calculate Quantum Bit Error Rate"""
+        if len(matched_indices) == 0:
+            return 0.0
+        return float(np.count_nonzero(alice_bits[matched_indices] != bob_bits[matched_indices])
+                     / len(matched_indices))
+
+    @staticmethod
+    def error_correction(sifted_key: np.ndarray, qber: float) -> np.ndarray:
+        """Simple error correction based on QBER"""
+        if qber < 0.1:
+            return sifted_key
+        elif qber < 0.3:
+            return sifted_key[::2]
+        else:
+            return sifted_key[::3]
@@ -0,0 +1,172 @@
+from typing import Any, Callable, Dict, Optional
+from datetime import date, datetime, time
+from itertools import islice
+import base64
+import json
+import os
+import sys
+
+from fastapi.responses import JSONResponse
+
+from startup import PROTOCOL_TABLES, lazy_import, module_available
+
+# Both are imported on first use rather than at boot
+np = lazy_import("numpy") if module_available("numpy") else None
+orjson = lazy_import("orjson") if module_available("orjson") else None
+
+_COMMA = ord(",")
+
+
+def _numpy_loaded() -> bool:
+    """NumPy values can only exist once something has imported numpy"""
+    return np is not None and "numpy" in sys.modules
+
+
+class PackedBits:
+    """A bit array serialized as base64 of its packed bytes instead of a JSON list"""
+
+    def __init__(self, bits):
+        self.bits = bits
+
+    def to_json(self) -> Dict[str, Any]:
+        if _numpy_loaded():
+            bits = np.asarray(self.bits, dtype=np.uint8)
+            packed = np.packbits(bits).tobytes()
+        else:
+            bits = list(self.bits)
+            pack, padded = PROTOCOL_TABLES.pack_msb, iter(bits + [0] * (-len(bits) % 8))
+            packed = bytes(pack[tuple(islice(padded, 8))] for _ in range((len(bits) + 7) // 8))
+        return {"length": len(bits), "packed": base64.b64encode(packed).decode("ascii")}
+
+
+def _default(obj: Any) -> Any:
+    """Fallback conversion for types the JSON backends do not know"""
+    if isinstance(obj, PackedBits):
+        return obj.to_json()
+    if isinstance(obj, (datetime, date, time)):
+        # Same ISO 8601 text orjson emits natively
+        return obj.isoformat()
+    if _numpy_loaded():
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _encode_int_array(arr) -> Optional[bytes]:
+    """Encode a 1-D non-negative integer array as a JSON list without going through Python ints"""
+    n = arr.size
+    if n == 0:
+        return b"[]"
+    low, high = int(arr.min()), int(arr.max())
+    if low < 0:
+        return None
+
+    if high <= 9:
+        # Bits, bases and photons: one ASCII digit per element
+        out = np.full(2 * n + 1, _COMMA, dtype=np.uint8)
+        out[0] = ord("[")
+        out[1::2] = arr.astype(np.uint8) + ord("0")
+        out[-1] = ord("]")
+        return out.tobytes()
+
+    # Wider values (e.g. matched indices): build a digit matrix and drop leading zeros
+    width = len(str(high))
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    values = arr.astype(np.int64)[:, None]
+    chars = np.empty((n, width + 1), dtype=np.uint8)
+    chars[:, :width] = (values // powers) % 10 + ord("0")
+    chars[:, width] = _COMMA
+    keep = np.ones((n, width + 1), dtype=bool)
+    keep[:, :width - 1] = values >= powers[:-1]
+    body = chars[keep]
+    body[-1] = ord("]")
+    return b"[" + body.tobytes()
+
+
+def _encode_numpy(obj: Any) -> bytes:
+    if isinstance(obj, dict):
+        return b"{" + b",".join(
+            json.dumps(str(key)).encode("utf-8") + b":" + _encode_numpy(value)
+            for key, value in obj.items()
+        ) + b"}"
+    if _numpy_loaded() and isinstance(obj, np.ndarray) and obj.ndim == 1 and obj.dtype.kind in "ui":
+        encoded = _encode_int_array(obj)
+        if encoded is not None:
+            return encoded
+    if isinstance(obj, PackedBits):
+        return _encode_numpy(obj.to_json())
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def dumps_json(obj: Any) -> bytes:
+    """Standard library encoder (FastAPI's default output format)"""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def dumps_numpy(obj: Any) -> bytes:
+    """Standard library encoder with a vectorized path for integer NumPy arrays"""
+    return _encode_numpy(obj)
+
+
+def dumps_orjson(obj: Any) -> bytes:
+    """orjson encoder with native NumPy support"""
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+SERIALIZERS: Dict[str, Callable[[Any], bytes]] = {"json": dumps_json}
+if np is not None:
+    SERIALIZERS["numpy"] = dumps_numpy
+if orjson is not None:
+    SERIALIZERS["orjson"] = dumps_orjson
+
+
+def register_serializer(name: str, dumps: Callable[[Any], bytes]):
+    """Make an additional encoder selectable by name"""
+    SERIALIZERS[name] = dumps
+
+
+def get_serializer(name: Optional[str] = None) -> Callable[[Any], bytes]:
+    """Return the named encoder, or the fastest one available"""
+    if name is None:
+        for candidate in ("orjson", "numpy", "json"):
+            if candidate in SERIALIZERS:
+                return SERIALIZERS[candidate]
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer '{name}' (available: {', '.join(SERIALIZERS)})")
+    return SERIALIZERS[name]
+
+
+# Encoder used by the API, overridable with BB84_JSON_BACKEND=json|numpy|orjson
+dumps = get_serializer(os.environ.get("BB84_JSON_BACKEND") or None)
+
+
+def dumps_str(obj: Any) -> str:
+    """Serialize to a str for Socket.IO payloads"""
+    return dumps(obj).decode("utf-8")
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the configured encoder; accepts NumPy arrays and PackedBits"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class SocketIOJSON:
+    """Drop-in for the json module used by socketio/engineio packet encoding"""
+
+    @staticmethod
+    def dumps(obj: Any, *args, **kwargs) -> str:
+        return dumps_str(obj)
+
+    @staticmethod
+    def loads(data, *args, **kwargs):
+        return loads(data)
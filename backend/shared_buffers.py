@@ -0,0 +1,273 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import os
+import weakref
+
+import numpy as np
+
+from numpy_protocol import NumpyBB84Protocol
+
+# Photons per worker task; fixed so seeded runs do not depend on the pool size
+CHUNK_SIZE = 1 << 20
+
+logger = logging.getLogger(__name__)
+
+# Per-photon uint8 buffers a simulation works on
+BUFFER_KEYS = ["alice_bits", "alice_bases", "bob_bases", "bob_measurements", "matched"]
+
+
+class BufferHandle:
+    """Picklable description of a shared-memory array; workers attach by name"""
+
+    def __init__(self, name: str, length: int, dtype: str = "uint8"):
+        self.name = name
+        self.length = length
+        self.dtype = dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.length * np.dtype(self.dtype).itemsize
+
+    def __repr__(self):
+        return f"BufferHandle({self.name!r}, {self.length}, {self.dtype!r})"
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Open an existing segment without handing its lifetime to this process"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the segment with the resource tracker;
+        # pool workers share the parent's tracker, so this is a no-op there
+        return shared_memory.SharedMemory(name=name)
+
+
+def _view(segment: shared_memory.SharedMemory, handle: BufferHandle) -> np.ndarray:
+    return np.ndarray((handle.length,), dtype=handle.dtype, buffer=segment.buf)
+
+
+def run_in_views(handles: Dict[str, BufferHandle], job: Callable, *args) -> Any:
+    """Worker entry point: attach the buffers, run job(views, *args), detach"""
+    segments = {key: _attach(handle.name) for key, handle in handles.items()}
+    views = {key: _view(segments[key], handle) for key, handle in handles.items()}
+    try:
+        return job(views, *args)
+    finally:
+        views.clear()
+        for segment in segments.values():
+            segment.close()
+
+
+def simulate_chunk(views: Dict[str, np.ndarray], start: int, stop: int, eve_prob: float,
+                   seed: np.random.SeedSequence) -> Tuple[int, int]:
+    """Run every BB84 stage for photons [start, stop) in place; returns (matched, errors)"""
+    protocol = NumpyBB84Protocol
+    rng = np.random.default_rng(seed)
+    n = stop - start
+    bits = views["alice_bits"][start:stop]
+    bases = views["alice_bases"][start:stop]
+    bob_bases = views["bob_bases"][start:stop]
+    measurements = views["bob_measurements"][start:stop]
+
+    np.copyto(bits, protocol.generate_random_bits(n, rng))
+    np.copyto(bases, protocol.generate_random_bases(n, rng))
+    photons = protocol.simulate_eve_interception(protocol.encode_photons(bits, bases), eve_prob, rng)
+    np.copyto(bob_bases, protocol.generate_random_bases(n, rng))
+    np.copyto(measurements, protocol.measure_photons(photons, bob_bases, rng))
+    return compare_chunk(views, start, stop)
+
+
+def compare_chunk(views: Dict[str, np.ndarray], start: int, stop: int) -> Tuple[int, int]:
+    """Mark matching bases for [start, stop) in place; returns (matched, errors)"""
+    matched = views["matched"][start:stop]
+    np.equal(views["alice_bases"][start:stop], views["bob_bases"][start:stop], out=matched.view(bool))
+    mask = matched.view(bool)
+    errors = np.count_nonzero(views["alice_bits"][start:stop][mask] != views["bob_measurements"][start:stop][mask])
+    return int(np.count_nonzero(mask)), int(errors)
+
+
+class SharedBufferManager:
+    """Allocates shared-memory arrays and frees them by reference count
+
+    Every buffer belongs to an owner (normally a single job). The owner
+    holds one reference and every `hold` holds another, so a segment is
+    unlinked only after its owner released it and nobody is still reading it.
+    """
+
+    def __init__(self):
+        self.segments: Dict[str, shared_memory.SharedMemory] = {}
+        self.refcounts: Dict[str, int] = {}
+        self.owned: Dict[str, Dict[str, BufferHandle]] = {}
+        # Views handed out by array(); slices of them keep them alive through .base
+        self.views: Dict[str, List[weakref.ref]] = {}
+
+    def allocate(self, owner: str, key: str, length: int, dtype: str = "uint8") -> BufferHandle:
+        """Return the owner's buffer for key, allocating it when missing or too small"""
+        existing = self.owned.get(owner, {}).get(key)
+        if existing is not None and self.refcounts.get(existing.name, 0) > 1:
+            raise RuntimeError(f"buffer '{key}' of {owner} is still in use by another job")
+        if existing is not None and existing.length >= length and existing.dtype == dtype:
+            return BufferHandle(existing.name, length, dtype)
+        if existing is not None:
+            self.release(existing)
+
+        nbytes = max(1, length * np.dtype(dtype).itemsize)
+        segment = shared_memory.SharedMemory(create=True, size=nbytes)
+        handle = BufferHandle(segment.name, length, dtype)
+        self.segments[segment.name] = segment
+        self.refcounts[segment.name] = 1
+        self.owned.setdefault(owner, {})[key] = handle
+        return handle
+
+    def array(self, handle: BufferHandle) -> np.ndarray:
+        """A NumPy view of a buffer in this process; stays valid after the buffer is released"""
+        view = _view(self.segments[handle.name], handle)
+        self.views.setdefault(handle.name, []).append(weakref.ref(view))
+        return view
+
+    def acquire(self, handle: BufferHandle) -> BufferHandle:
+        self.refcounts[handle.name] += 1
+        return handle
+
+    @contextmanager
+    def hold(self, handles: Dict[str, BufferHandle]):
+        """Keep the buffers alive for the block, even if their owner is released meanwhile"""
+        for handle in handles.values():
+            self.acquire(handle)
+        try:
+            yield
+        finally:
+            for handle in handles.values():
+                self.release(handle)
+
+    def release(self, handle: BufferHandle):
+        name = handle.name
+        if name not in self.refcounts:
+            return
+        self.refcounts[name] -= 1
+        if self.refcounts[name] > 0:
+            return
+
+        del self.refcounts[name]
+        segment = self.segments.pop(name)
+        segment.unlink()
+        self._close_when_unused(segment, self.views.pop(name, []))
+
+    @staticmethod
+    def _close_when_unused(segment: shared_memory.SharedMemory, views: List[weakref.ref]):
+        # NumPy does not pin the mapping, so unmapping under a live view would
+        # crash; wait for the last view handed out by array() to be collected
+        live = [view for view in (ref() for ref in views) if view is not None]
+        if not live:
+            segment.close()
+            return
+        remaining = [len(live)]
+
+        def view_collected():
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                segment.close()
+
+        for view in live:
+            weakref.finalize(view, view_collected)
+
+    def release_owner(self, owner: str):
+        """Drop the owner's reference to all of its buffers"""
+        for handle in self.owned.pop(owner, {}).values():
+            self.release(handle)
+
+    def close(self):
+        for owner in list(self.owned):
+            self.release_owner(owner)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "owners": len(self.owned),
+            "segments": len(self.segments),
+            "bytes": sum(segment.size for segment in self.segments.values()),
+        }
+
+
+class ProtocolWorkerPool:
+    """Process pool that runs BB84 jobs directly on shared-memory buffers"""
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.buffers = SharedBufferManager()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        atexit.register(self.close)
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _reset_executor(self):
+        """Drop a broken executor; the next job starts a fresh one"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run_chunks(self, handles: Dict[str, BufferHandle], length: int, job: Callable,
+                          chunk_args: Callable[[int], tuple]) -> List[Tuple[int, int]]:
+        """Run job over every chunk; the caller must hold the buffers"""
+        try:
+            futures = [
+                asyncio.wrap_future(self.executor.submit(
+                    run_in_views, handles, job, start, min(start + CHUNK_SIZE, length), *chunk_args(index)))
+                for index, start in enumerate(range(0, length, CHUNK_SIZE))
+            ]
+            return await asyncio.gather(*futures)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); fail this job only
+            logger.error("Protocol worker pool broke, restarting it for the next job")
+            self._reset_executor()
+            raise
+
+    async def simulate(self, owner: str, n_bits: int, eve_prob: float,
+                       seed: Optional[int] = None) -> Dict[str, Any]:
+        """Full BB84 round in the owner's buffers
+
+        `owner` must be unique to this call (e.g. a request id). The bit arrays
+        in the result are views of its buffers and stay valid until the
+        caller releases the owner.
+        """
+        handles = {key: self.buffers.allocate(owner, key, n_bits) for key in BUFFER_KEYS}
+        chunks = (n_bits + CHUNK_SIZE - 1) // CHUNK_SIZE
+        seeds = np.random.SeedSequence(seed).spawn(chunks)
+        with self.buffers.hold(handles):
+            counts = await self._run_chunks(handles, n_bits, simulate_chunk,
+                                            lambda index: (eve_prob, seeds[index]))
+            views = {key: self.buffers.array(handle) for key, handle in handles.items()}
+        matched_indices = np.flatnonzero(views.pop("matched"))
+        matched = sum(count for count, _ in counts)
+        qber = sum(errors for _, errors in counts) / matched if matched else 0.0
+        alice_sifted = views["alice_bits"][matched_indices]
+        return {
+            "alice_bits": views["alice_bits"],
+            "alice_bases": views["alice_bases"],
+            "bob_bases": views["bob_bases"],
+            "bob_measurements": views["bob_measurements"],
+            "matched_indices": matched_indices,
+            "alice_sifted": alice_sifted,
+            "bob_sifted": views["bob_measurements"][matched_indices],
+            "qber": qber,
+            "final_key": NumpyBB84Protocol.error_correction(alice_sifted, qber),
+            "eve_intercepted": eve_prob > 0
+        }
+
+    def release_owner(self, owner: str):
+        self.buffers.release_owner(owner)
+
+    def close(self):
+        self._reset_executor()
+        self.buffers.close()
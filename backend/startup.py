@@ -0,0 +1,121 @@
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import importlib
+import importlib.util
+import os
+import sys
+import time
+import types
+
+# lazy (default): optional/heavy modules load on first use
+# eager: load them at boot, e.g. to pre-warm a worker before it takes traffic
+STARTUP_MODE = os.environ.get("BB84_STARTUP", "lazy")
+
+_boot_started = time.perf_counter()
+_boot_finished: Optional[float] = None
+import_timings: Dict[str, float] = {}
+deferred_timings: Dict[str, float] = {}
+_lazy_modules: Dict[str, "LazyModule"] = {}
+# Time spent in nested timers, one entry per open import_timer block
+_nested_timings: List[float] = []
+
+
+@contextmanager
+def import_timer(label: str):
+    """Record how long the imports inside the block take, excluding nested timers
+
+    Only leaf time is recorded, so the breakdown never adds up to more than the boot time.
+    """
+    start = time.perf_counter()
+    _nested_timings.append(0.0)
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = _nested_timings.pop()
+        import_timings[label] = import_timings.get(label, 0.0) + elapsed - nested
+        if _nested_timings:
+            _nested_timings[-1] += elapsed
+
+
+def module_available(name: str) -> bool:
+    """Check whether a module can be imported without importing it"""
+    return name in sys.modules or importlib.util.find_spec(name) is not None
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that performs the real import on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            if _boot_finished is not None:
+                deferred_timings[self.__name__] = time.perf_counter() - start
+            self.__dict__["_module"] = module
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__["_module"] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a proxy for `name`; in eager mode the module is imported right away"""
+    if name not in _lazy_modules:
+        module = LazyModule(name)
+        _lazy_modules[name] = module
+        if STARTUP_MODE == "eager":
+            with import_timer(name):
+                module._load()
+    return _lazy_modules[name]
+
+
+class ProtocolTables:
+    """Lookup tables for the pure-Python protocol, built once per process"""
+
+    def __init__(self):
+        # encode[basis][bit] -> photon (0/1 rectilinear, 2/3 diagonal)
+        self.encode: List[List[int]] = [[bit + 2 * basis for bit in (0, 1)] for basis in (0, 1)]
+        # measure[basis][photon] -> bit, or -1 when the basis is wrong and the result is random
+        self.measure: List[List[int]] = [
+            [photon % 2 if photon // 2 == basis else -1 for photon in range(4)]
+            for basis in (0, 1)
+        ]
+        # pack_lsb[bits] -> byte with bits[0] as the least significant bit (OTP key order)
+        self.pack_lsb: Dict[Tuple[int, ...], int] = {}
+        # pack_msb[bits] -> byte with bits[0] as the most significant bit (np.packbits order)
+        self.pack_msb: Dict[Tuple[int, ...], int] = {}
+        for byte in range(256):
+            lsb_first = tuple((byte >> i) & 1 for i in range(8))
+            self.pack_lsb[lsb_first] = byte
+            self.pack_msb[lsb_first[::-1]] = byte
+
+
+with import_timer("protocol_tables"):
+    PROTOCOL_TABLES = ProtocolTables()
+
+
+def mark_ready():
+    """Call once the app is fully constructed"""
+    global _boot_finished
+    _boot_finished = time.perf_counter()
+
+
+def startup_report() -> Dict:
+    boot_ms = ((_boot_finished or time.perf_counter()) - _boot_started) * 1000
+    return {
+        "mode": STARTUP_MODE,
+        "boot_ms": round(boot_ms, 2),
+        "imports_ms": {label: round(seconds * 1000, 2) for label, seconds in import_timings.items()},
+        "deferred": {name: module.loaded for name, module in _lazy_modules.items()},
+        "deferred_load_ms": {name: round(seconds * 1000, 2) for name, seconds in deferred_timings.items()},
+    }
@@ -0,0 +1,153 @@
+from collections import deque
+from typing import Deque, Dict, List
+import math
+
+DEFAULT_WINDOW = 4
+MAX_WINDOW = 64
+MAX_PENDING_BLOCKS = 64
+MAX_BLOCK_SIZE = 4096
+
+
+class TransmissionError(ValueError):
+    """A block that cannot be accepted or acknowledged"""
+
+
+class DuplicateBlockError(TransmissionError):
+    """A block whose sequence number was already received"""
+
+
+def _check_seq(seq) -> int:
+    if isinstance(seq, bool) or not isinstance(seq, int) or seq < 0:
+        raise TransmissionError("seq must be a non-negative integer")
+    return seq
+
+
+def _check_eve_prob(eve_prob) -> float:
+    if (isinstance(eve_prob, bool) or not isinstance(eve_prob, (int, float))
+            or not math.isfinite(eve_prob) or not 0.0 <= eve_prob <= 1.0):
+        raise TransmissionError("eve_prob must be a number between 0 and 1")
+    return float(eve_prob)
+
+
+def _check_window(window) -> int:
+    if isinstance(window, bool) or not isinstance(window, int) or not 1 <= window <= MAX_WINDOW:
+        raise TransmissionError(f"window must be an integer between 1 and {MAX_WINDOW}")
+    return window
+
+
+def _check_bits(name: str, values, length: int):
+    if not isinstance(values, list) or len(values) != length:
+        raise TransmissionError(f"{name} must be a list of {length} values")
+    if any(value not in (0, 1) for value in values):
+        raise TransmissionError(f"{name} must only contain 0 and 1")
+
+
+def check_photons(bits, bases, eve_prob) -> float:
+    """Validate a whole-key `alice_send_photons` message, returning eve_prob as a float"""
+    if not isinstance(bits, list):
+        raise TransmissionError("bits must be a list")
+    _check_bits("bits", bits, len(bits))
+    _check_bits("bases", bases, len(bits))
+    return _check_eve_prob(eve_prob)
+
+
+class PhotonBlock:
+    """One sequenced block of an incremental photon transmission"""
+
+    def __init__(self, seq: int, offset: int, bits: List[int], bases: List[int], eve_prob: float):
+        self.seq = seq
+        self.offset = offset
+        self.bits = bits
+        self.bases = bases
+        self.eve_prob = eve_prob
+        self.photons: List[int] = []
+
+    def __len__(self):
+        return len(self.bits)
+
+
+class BlockTransmission:
+    """Sequencing and flow-control state for a block-based photon transmission
+
+    Alice's blocks are accepted strictly in sequence order (later ones are
+    held until the gap fills), queued, and released to Bob while fewer than
+    `window` blocks are awaiting his acknowledgement. Bob acknowledges a
+    block by sending its basis comparison, which frees a window slot.
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW, max_pending: int = MAX_PENDING_BLOCKS,
+                 max_block_size: int = MAX_BLOCK_SIZE):
+        self.window = _check_window(window)
+        self.max_pending = max_pending
+        self.max_block_size = max_block_size
+        self.next_seq = 0
+        self.next_offset = 0
+        self.out_of_order: Dict[int, tuple] = {}
+        self.pending: Deque[PhotonBlock] = deque()
+        self.in_flight: Dict[int, PhotonBlock] = {}
+        self.acked_blocks = 0
+        self.matched_total = 0
+        self.errors_total = 0
+
+    @property
+    def buffered(self) -> int:
+        return len(self.pending) + len(self.out_of_order)
+
+    @property
+    def capacity(self) -> int:
+        """How many more blocks Alice may send without being rejected"""
+        return max(0, self.max_pending - self.buffered)
+
+    @property
+    def qber(self) -> float:
+        return self.errors_total / self.matched_total if self.matched_total else 0.0
+
+    def accept(self, seq: int, bits: List[int], bases: List[int], eve_prob: float) -> List[PhotonBlock]:
+        """Take a block from Alice; returns the blocks that are now in sequence"""
+        _check_seq(seq)
+        if not isinstance(bits, list) or not bits or len(bits) > self.max_block_size:
+            raise TransmissionError(f"block size must be between 1 and {self.max_block_size}")
+        _check_bits("bits", bits, len(bits))
+        _check_bits("bases", bases, len(bits))
+        eve_prob = _check_eve_prob(eve_prob)
+        if seq < self.next_seq or seq in self.out_of_order:
+            raise DuplicateBlockError(f"block {seq} was already received")
+        if self.buffered >= self.max_pending:
+            raise TransmissionError("transmission buffer full")
+
+        self.out_of_order[seq] = (bits, bases, eve_prob)
+        accepted = []
+        while self.next_seq in self.out_of_order:
+            bits, bases, eve_prob = self.out_of_order.pop(self.next_seq)
+            block = PhotonBlock(self.next_seq, self.next_offset, bits, bases, eve_prob)
+            self.pending.append(block)
+            accepted.append(block)
+            self.next_seq += 1
+            self.next_offset += len(block)
+        return accepted
+
+    def release(self) -> List[PhotonBlock]:
+        """Move queued blocks into flight while the window has room"""
+        released = []
+        while self.pending and len(self.in_flight) < self.window:
+            block = self.pending.popleft()
+            self.in_flight[block.seq] = block
+            released.append(block)
+        return released
+
+    def acknowledge(self, seq: int, bob_bases: List[int], bob_measurements: List[int]) -> PhotonBlock:
+        """Bob has compared bases for a block; frees its window slot"""
+        _check_seq(seq)
+        if seq not in self.in_flight:
+            raise TransmissionError(f"block {seq} is not awaiting acknowledgement")
+        length = len(self.in_flight[seq])
+        _check_bits("bob_bases", bob_bases, length)
+        _check_bits("bob_measurements", bob_measurements, length)
+        self.acked_blocks += 1
+        return self.in_flight.pop(seq)
+
+    def record_sift(self, matched: int, errors: int) -> float:
+        """Add a block's sifting outcome and return the running QBER"""
+        self.matched_total += matched
+        self.errors_total += errors
+        return self.qber
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+BB84 QKD Demo Benchmark Suite
+Measures every BB84Protocol stage, OTP throughput, JSON serialization of
+/simulate responses and in-process ASGI / Socket.IO load, and writes JSON
+results that can be compared across commits to catch regressions.
+
+Usage:
+    python benchmark.py                              # full run, 10^3 .. 10^7 photons
+    python benchmark.py --max-bits 100000            # quicker run
+    python benchmark.py --output new.json --compare old.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import main
+from main import BB84Protocol
+
+DEFAULT_SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+OTP_SIZES = [1_000, 10_000, 100_000]
+OTP_KEY_BITS = 256
+
+
+def measure(fn, repeat, budget):
+    """Time fn() up to `repeat` times, stopping early once `budget` seconds are spent"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+        if sum(times) >= budget:
+            break
+    return {
+        "runs": len(times),
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+    }
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def latency_summary(latencies, wall_time):
+    return {
+        "count": len(latencies),
+        "p50_s": percentile(latencies, 50),
+        "p99_s": percentile(latencies, 99),
+        "median_s": statistics.median(latencies),
+        "throughput_per_s": len(latencies) / wall_time if wall_time else 0.0,
+    }
+
+
+def bench_protocol_stages(sizes, repeat, budget):
+    """Benchmark each BB84Protocol stage for every photon count"""
+    print("\n🔬 Benchmarking BB84 protocol stages...")
+    results = {}
+
+    for n in sizes:
+        bits = BB84Protocol.generate_random_bits(n)
+        bases = BB84Protocol.generate_random_bases(n)
+        photons = BB84Protocol.encode_photons(bits, bases)
+        bob_bases = BB84Protocol.generate_random_bases(n)
+        measurements = BB84Protocol.measure_photons(photons, bob_bases)
+        matched_indices = [i for i in range(n) if bases[i] == bob_bases[i]]
+        sifted_key = [bits[i] for i in matched_indices]
+
+        def sift():
+            matched = [i for i in range(n) if bases[i] == bob_bases[i]]
+            return [bits[i] for i in matched], [measurements[i] for i in matched]
+
+        stages = {
+            "generate_random_bits": lambda: BB84Protocol.generate_random_bits(n),
+            "generate_random_bases": lambda: BB84Protocol.generate_random_bases(n),
+            "encode_photons": lambda: BB84Protocol.encode_photons(bits, bases),
+            "simulate_eve_interception": lambda: BB84Protocol.simulate_eve_interception(photons, 0.2),
+            "measure_photons": lambda: BB84Protocol.measure_photons(photons, bob_bases),
+            "sift": sift,
+            "calculate_qber": lambda: BB84Protocol.calculate_qber(bits, measurements, matched_indices),
+            "error_correction": lambda: BB84Protocol.error_correction(sifted_key, 0.2),
+        }
+
+        for stage, fn in stages.items():
+            stats = measure(fn, repeat, budget)
+            stats.update({"n": n, "unit": "photons", "throughput_per_s": n / stats["median_s"]})
+            results[f"protocol.{stage}[{n}]"] = stats
+            print(f"   {stage:<28} n={n:<9} {stats['median_s'] * 1e3:10.2f} ms")
+
+    return results
+
+
+def bench_otp(repeat, budget):
+    """Benchmark OTP encryption/decryption throughput"""
+    print("\n🔐 Benchmarking OTP throughput...")
+    results = {}
+    key = BB84Protocol.generate_random_bits(OTP_KEY_BITS)
+
+    for size in OTP_SIZES:
+        message = "".join(random.choice("abcdefghijklmnopqrstuvwxyz ") for _ in range(size))
+        ciphertext = BB84Protocol.encrypt_message_otp(message, key)
+
+        for name, fn in (
+            ("encrypt", lambda: BB84Protocol.encrypt_message_otp(message, key)),
+            ("decrypt", lambda: BB84Protocol.decrypt_message_otp(ciphertext, key)),
+        ):
+            stats = measure(fn, repeat, budget)
+            stats.update({"n": size, "unit": "bytes", "throughput_per_s": size / stats["median_s"]})
+            results[f"otp.{name}[{size}]"] = stats
+            print(f"   {name:<8} {size:>7} bytes {stats['throughput_per_s'] / 1e6:8.2f} MB/s")
+
+    return results
+
+
+def bench_serialization(sizes, repeat, budget, seed):
+    """Benchmark JSON serialization of simulate_bb84 responses per engine and encoder"""
+    print("\n📦 Benchmarking /simulate JSON serialization...")
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from serialization import SERIALIZERS
+
+    results = {}
+    for n in sizes:
+        for engine, load_engine in main.SIMULATION_ENGINES.items():
+            protocol = load_engine()
+            simulate = lambda: main.run_simulation(n, 0.2, protocol.make_rng(seed), protocol)
+            simulation = measure(simulate, repeat, budget)
+            simulation.update({"n": n, "unit": "photons", "throughput_per_s": n / simulation["median_s"]})
+            results[f"simulate.{engine}[{n}]"] = simulation
+            print(f"   simulate.{engine:<23} n={n:<9} {simulation['median_s'] * 1e3:10.2f} ms")
+
+            response = simulate()
+            encoders = {name: (lambda dumps=dumps: dumps(response)) for name, dumps in SERIALIZERS.items()}
+            if engine == "python":
+                encoders["json_dumps"] = lambda: json.dumps(response)
+                encoders["fastapi_response"] = lambda: JSONResponse(content=jsonable_encoder(response)).body
+
+            for name, fn in encoders.items():
+                payload_bytes = len(fn())
+                stats = measure(fn, repeat, budget)
+                stats.update({
+                    "n": n, "unit": "photons", "payload_bytes": payload_bytes,
+                    "throughput_per_s": n / stats["median_s"],
+                    "share_of_request": stats["median_s"] / (stats["median_s"] + simulation["median_s"]),
+                })
+                key = f"serialize.{name}[{n}]" if name in ("json_dumps", "fastapi_response") \
+                    else f"serialize.{engine}.{name}[{n}]"
+                results[key] = stats
+                print(f"   {key.split('[')[0]:<32} n={n:<9} {stats['median_s'] * 1e3:10.2f} ms"
+                      f"  ({stats['share_of_request']:.0%} of request)")
+
+    return results
+
+
+async def _asgi_load(paths, concurrency):
+    import httpx
+
+    transport = httpx.ASGITransport(app=main.app)
+    latencies = []
+    queue = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            while not queue.empty():
+                url = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.get(url)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall_time = time.perf_counter() - start
+
+    return latency_summary(latencies, wall_time)
+
+
+def bench_asgi(requests_total, concurrency, n_bits, seed):
+    """In-process ASGI load test of the HTTP endpoints"""
+    print("\n🌐 Benchmarking in-process ASGI endpoints...")
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        print("⚠️  httpx is not installed -- skipping ASGI load test")
+        return {}
+
+    # Every simulate request gets its own seed: reproducible, and never served from the cache
+    main.simulation_cache.clear()
+    simulate_path = f"/simulate?n_bits={n_bits}&eve_prob=0.2"
+    results = {}
+    for name, path, paths in (
+        (f"asgi.simulate[{n_bits}]", simulate_path,
+         [f"{simulate_path}&seed={seed + i}" for i in range(requests_total)]),
+        ("asgi.session_status", "/session/status", ["/session/status"] * requests_total),
+    ):
+        stats = asyncio.run(_asgi_load(paths, concurrency))
+        stats.update({"concurrency": concurrency})
+        results[name] = stats
+        print(f"   {path:<40} p50={stats['p50_s'] * 1e3:8.2f} ms  p99={stats['p99_s'] * 1e3:8.2f} ms"
+              f"  {stats['throughput_per_s']:8.1f} req/s")
+
+    return results
+
+
+async def _socketio_flows(flows, n_bits, port, timeout=30.0):
+    import loadgen
+
+    # Real Socket.IO clients against socketio.ASGIApp served by uvicorn in this event loop
+    server, server_task = await loadgen.start_inprocess_server(port)
+    stats = {"sent": 0, "received": 0, "received_bytes": 0}
+    latencies = {step: [] for step in loadgen.STEPS}
+    group = loadgen.ClientGroup(0, stats)
+    try:
+        errors = await loadgen.connect_all(group.clients, f"http://127.0.0.1:{port}", timeout, len(group.clients))
+        if errors:
+            raise errors[0]
+        start = time.perf_counter()
+        for _ in range(flows):
+            await group.run_flow(n_bits, 0.2, timeout, latencies)
+        wall_time = time.perf_counter() - start
+    finally:
+        await asyncio.gather(*(client.disconnect() for client in group.clients), return_exceptions=True)
+        server.should_exit = True
+        await server_task
+        main.session.reset()
+    return {step: latency_summary(samples, wall_time) for step, samples in latencies.items()}
+
+
+def bench_socketio(flows, n_bits, port):
+    """In-process Socket.IO load test through the ASGI app (Alice -> Bob -> message flow)"""
+    print("\n⚡ Benchmarking in-process Socket.IO flows...")
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        print("⚠️  aiohttp is not installed -- skipping Socket.IO load test")
+        return {}
+
+    results = {}
+    for step, stats in asyncio.run(_socketio_flows(flows, n_bits, port)).items():
+        stats.update({"n": n_bits})
+        results[f"socketio.{step}[{n_bits}]"] = stats
+        print(f"   {step:<20} p50={stats['p50_s'] * 1e3:8.2f} ms  p99={stats['p99_s'] * 1e3:8.2f} ms")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def compare_results(current, baseline_path, threshold):
+    """Compare results against a previous run; returns the list of regressions"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    print(f"\n📊 Comparing against {baseline_path} (threshold {threshold:.0%})...")
+    regressions = []
+    for name, stats in current.items():
+        old = baseline.get(name)
+        if not old or "median_s" not in old or not old["median_s"]:
+            continue
+        ratio = stats["median_s"] / old["median_s"]
+        marker = "✅"
+        if ratio > 1 + threshold:
+            marker = "❌"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            marker = "🚀"
+        print(f"   {marker} {name:<50} {ratio:6.2f}x")
+
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="BB84 QKD Demo benchmark suite")
+    parser.add_argument("--max-bits", type=int, default=DEFAULT_SIZES[-1],
+                        help="largest photon count to benchmark (default: 10^7)")
+    parser.add_argument("--max-serialize-bits", type=int, default=10 ** 6,
+                        help="largest /simulate response to serialize (default: 10^6)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement")
+    parser.add_argument("--budget", type=float, default=2.0,
+                        help="seconds after which a measurement stops repeating")
+    parser.add_argument("--requests", type=int, default=200, help="ASGI requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10, help="concurrent ASGI clients")
+    parser.add_argument("--asgi-bits", type=int, default=1000, help="n_bits for /simulate load test")
+    parser.add_argument("--flows", type=int, default=100, help="Socket.IO flows to run")
+    parser.add_argument("--socketio-port", type=int, default=8766,
+                        help="loopback port for the in-process Socket.IO server")
+    parser.add_argument("--seed", type=int, default=84, help="random seed for reproducible inputs")
+    parser.add_argument("--output", default="bench_results.json", help="where to write JSON results")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    for name in ("main", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    random.seed(args.seed)
+    sizes = [n for n in DEFAULT_SIZES if n <= args.max_bits]
+
+    print("🚀 BB84 QKD Demo Benchmark Suite")
+    print("=" * 50)
+
+    results = {}
+    results.update(bench_protocol_stages(sizes, args.repeat, args.budget))
+    results.update(bench_otp(args.repeat, args.budget))
+    results.update(bench_serialization([n for n in sizes if n <= args.max_serialize_bits],
+                                       args.repeat, args.budget, args.seed))
+    results.update(bench_asgi(args.requests, args.concurrency, args.asgi_bits, args.seed))
+    results.update(bench_socketio(args.flows, args.asgi_bits, args.socketio_port))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 50)
+    print(f"💾 Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        regressions = compare_results(results, args.compare, args.threshold)
+        if regressions:
+            print(f"⚠️  {len(regressions)} regression(s) detected")
+            return 1
+        print("🎯 No regressions detected")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+BB84 QKD Demo Socket.IO Load Generator
+Spawns many scripted Alice/Bob/Eve clients that run the
+alice_send_photons -> basis_comparison -> send_message flow against a
+server and reports p50/p99 latency and message throughput.
+
+Usage:
+    python loadgen.py --url http://localhost:8000 --groups 100
+    python loadgen.py --spawn-server --groups 1000 --rounds 3
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+import socketio
+
+STEPS = ["photons", "basis_comparison", "message", "flow"]
+# Steps whose reply is broadcast to every Bob: with more than one group the
+# first matching broadcast may belong to another group, so their latency
+# cannot be attributed to the group that measured it
+BROADCAST_STEPS = ["photons", "basis_comparison"]
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class ScriptedClient:
+    """A single Socket.IO client joined as one user"""
+
+    def __init__(self, user_id: str, stats: dict, parse: bool):
+        self.user_id = user_id
+        self.stats = stats
+        self.parse = parse
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.waiters = []
+        self.joined = asyncio.Event()
+        self.sio.on('message', self._on_message)
+        self.sio.on('joined', self._on_joined)
+
+    async def _on_joined(self, data):
+        self.joined.set()
+
+    async def _on_message(self, data):
+        self.stats["received"] += 1
+        self.stats["received_bytes"] += len(data.encode("utf-8")) if isinstance(data, str) else len(data)
+        if not self.parse or not self.waiters:
+            return
+
+        message = json.loads(data) if isinstance(data, str) else data
+        for waiter in list(self.waiters):
+            message_type, predicate, future = waiter
+            if message["type"] == message_type and predicate(message["data"]) and not future.done():
+                future.set_result((time.perf_counter(), message["data"]))
+                self.waiters.remove(waiter)
+                break
+
+    def expect(self, message_type: str, predicate=lambda data: True) -> asyncio.Future:
+        """Register interest in the next message of a type matching predicate"""
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((message_type, predicate, future))
+        return future
+
+    async def connect(self, url: str, timeout: float):
+        await self.sio.connect(url, transports=['websocket'], wait_timeout=timeout)
+        await self.sio.emit('join', {'user_id': self.user_id})
+        await asyncio.wait_for(self.joined.wait(), timeout)
+
+    async def send(self, message_type: str, data: dict):
+        await self.sio.emit('message', json.dumps({"type": message_type, "data": data}))
+        self.stats["sent"] += 1
+
+    async def disconnect(self):
+        if self.sio.connected:
+            await self.sio.disconnect()
+
+
+class ClientGroup:
+    """One scripted Alice/Bob/Eve trio
+
+    All groups share the server's single BB84 session, so under load Bob may
+    pick up another group's photons or comparison result first; only the
+    final message is matched exactly (see BROADCAST_STEPS).
+    """
+
+    def __init__(self, index: int, stats: dict):
+        self.alice = ScriptedClient(f"alice-{index}", stats, parse=False)
+        self.bob = ScriptedClient(f"bob-{index}", stats, parse=True)
+        self.eve = ScriptedClient(f"eve-{index}", stats, parse=False)
+
+    @property
+    def clients(self):
+        return [self.alice, self.bob, self.eve]
+
+    async def run_flow(self, n_bits: int, eve_prob: float, timeout: float, latencies: dict):
+        """Run one Alice -> Bob -> message round and record per-step latencies"""
+        bits = [random.randint(0, 1) for _ in range(n_bits)]
+        bases = [random.randint(0, 1) for _ in range(n_bits)]
+        flow_start = time.perf_counter()
+
+        # Alice sends photons; Bob waits for them to arrive
+        arrival = self.bob.expect("photons_received")
+        start = time.perf_counter()
+        await self.alice.send("alice_send_photons", {"bits": bits, "bases": bases, "eve_prob": eve_prob})
+        received_at, data = await asyncio.wait_for(arrival, timeout)
+        latencies["photons"].append(received_at - start)
+
+        # Eve reports her interception alongside the transmission
+        if random.random() < eve_prob:
+            await self.eve.send("eve_intercept", {
+                "bits": [random.randint(0, 1) for _ in range(n_bits)],
+                "bases": [random.randint(0, 1) for _ in range(n_bits)],
+            })
+
+        # Bob measures and publishes his bases
+        bob_bases = [random.randint(0, 1) for _ in range(n_bits)]
+        measurements = [
+            (photon % 2) if (photon >= 2) == bool(base) else random.randint(0, 1)
+            for photon, base in zip(data["photons"], bob_bases)
+        ]
+        comparison = self.bob.expect("basis_comparison_complete")
+        start = time.perf_counter()
+        await self.bob.send("basis_comparison", {"bob_bases": bob_bases, "bob_measurements": measurements})
+        received_at, _ = await asyncio.wait_for(comparison, timeout)
+        latencies["basis_comparison"].append(received_at - start)
+
+        # Alice messages Bob; matched on a unique token in the content
+        token = uuid.uuid4().hex
+        delivery = self.bob.expect("new_message", lambda data: data["content"] == token)
+        start = time.perf_counter()
+        await self.alice.send("send_message", {"sender": "alice", "content": token, "encrypted": False})
+        received_at, _ = await asyncio.wait_for(delivery, timeout)
+        latencies["message"].append(received_at - start)
+
+        latencies["flow"].append(received_at - flow_start)
+
+
+async def connect_all(clients, url, timeout, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def connect(client):
+        async with semaphore:
+            await client.connect(url, timeout)
+
+    results = await asyncio.gather(*(connect(client) for client in clients), return_exceptions=True)
+    return [result for result in results if isinstance(result, Exception)]
+
+
+async def start_inprocess_server(port: int):
+    """Run the backend app with uvicorn inside this event loop"""
+    import uvicorn
+
+    sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+    import main
+
+    logging.getLogger("main").setLevel(logging.WARNING)
+    config = uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+async def run(args):
+    server = server_task = None
+    url = args.url
+    if args.spawn_server:
+        server, server_task = await start_inprocess_server(args.port)
+        url = f"http://127.0.0.1:{args.port}"
+
+    stats = {"sent": 0, "received": 0, "received_bytes": 0}
+    latencies = {step: [] for step in STEPS}
+    groups = [ClientGroup(i, stats) for i in range(args.groups)]
+    clients = [client for group in groups for client in group.clients]
+
+    print(f"🔌 Connecting {len(clients)} clients to {url}...")
+    connect_start = time.perf_counter()
+    connect_errors = await connect_all(clients, url, args.timeout, args.connect_concurrency)
+    print(f"   Connected in {time.perf_counter() - connect_start:.2f}s ({len(connect_errors)} failed)")
+
+    async def run_group(group):
+        failures = 0
+        for _ in range(args.rounds):
+            try:
+                await group.run_flow(args.n_bits, args.eve_prob, args.timeout, latencies)
+            except Exception:
+                failures += 1
+        return failures
+
+    print(f"🚀 Running {args.rounds} round(s) for {len(groups)} Alice/Bob/Eve groups...")
+    stats.update({"sent": 0, "received": 0, "received_bytes": 0})
+    start = time.perf_counter()
+    failures = sum(await asyncio.gather(*(run_group(group) for group in groups)))
+    wall_time = time.perf_counter() - start
+
+    await asyncio.gather(*(client.disconnect() for client in clients), return_exceptions=True)
+    if server is not None:
+        server.should_exit = True
+        await server_task
+
+    def summarize(samples):
+        return {
+            "count": len(samples),
+            "p50_s": percentile(samples, 50),
+            "p99_s": percentile(samples, 99),
+            "mean_s": statistics.mean(samples),
+        }
+
+    attributed = [step for step in STEPS if len(groups) == 1 or step not in BROADCAST_STEPS]
+    report = {
+        "clients": len(clients),
+        "groups": len(groups),
+        "rounds": args.rounds,
+        "n_bits": args.n_bits,
+        "connect_errors": len(connect_errors),
+        "failed_flows": failures,
+        "wall_time_s": wall_time,
+        "messages_sent": stats["sent"],
+        "messages_received": stats["received"],
+        "received_bytes": stats["received_bytes"],
+        "messages_per_s": stats["received"] / wall_time if wall_time else 0.0,
+        "flows_per_s": len(latencies["flow"]) / wall_time if wall_time else 0.0,
+        "latency": {step: summarize(latencies[step]) for step in attributed if latencies[step]},
+        # Time until *some* group's broadcast arrived; not this group's latency
+        "unattributed_latency": {
+            step: summarize(latencies[step]) for step in STEPS if step not in attributed and latencies[step]
+        },
+    }
+    return report
+
+
+def print_report(report):
+    print("\n" + "=" * 50)
+    print(f"📊 {report['groups']} groups x {report['rounds']} rounds, {report['n_bits']} bits, "
+          f"{report['wall_time_s']:.2f}s")
+    for step, summary in report["latency"].items():
+        print(f"   {step:<18} p50={summary['p50_s'] * 1e3:9.2f} ms  p99={summary['p99_s'] * 1e3:9.2f} ms"
+              f"  (n={summary['count']})")
+    for step, summary in report["unattributed_latency"].items():
+        print(f"   {step:<18} unattributed with {report['groups']} groups "
+              f"(p50={summary['p50_s'] * 1e3:.2f} ms to the first matching broadcast)")
+    print(f"   Throughput: {report['messages_per_s']:.0f} msg/s received, "
+          f"{report['flows_per_s']:.1f} flows/s")
+    print(f"   Sent {report['messages_sent']}, received {report['messages_received']} "
+          f"({report['received_bytes'] / 1e6:.1f} MB)")
+    if report["connect_errors"] or report["failed_flows"]:
+        print(f"⚠️  {report['connect_errors']} connection errors, {report['failed_flows']} failed flows")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="BB84 QKD Demo Socket.IO load generator")
+    parser.add_argument("--url", default="http://localhost:8000", help="server to load")
+    parser.add_argument("--spawn-server", action="store_true",
+                        help="run the backend in-process instead of using --url")
+    parser.add_argument("--port", type=int, default=8765, help="port for --spawn-server")
+    parser.add_argument("--groups", type=int, default=100, help="number of Alice/Bob/Eve trios")
+    parser.add_argument("--rounds", type=int, default=1, help="flows per group")
+    parser.add_argument("--n-bits", type=int, default=64, help="photons per transmission")
+    parser.add_argument("--eve-prob", type=float, default=0.2, help="Eve interception probability")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for each step")
+    parser.add_argument("--connect-concurrency", type=int, default=100,
+                        help="clients connecting at the same time")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible flows")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    print("🚀 BB84 QKD Demo Load Generator")
+    print("=" * 50)
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Wrote report to {args.output}")
+
+    return 1 if report["failed_flows"] or report["connect_errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
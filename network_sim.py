@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+BB84 QKD Trusted-Relay Network Simulator
+Runs BB84 on every link of a network concurrently, relays end-to-end keys
+through trusted nodes and reports key throughput for growing node counts.
+
+Usage:
+    python network_sim.py --topology ring --nodes 4,8,16 --rounds 5
+    python network_sim.py --topology grid --nodes 9,16,25 --loss 0.5 --eve-prob 1 --eve-fraction 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# Add backend directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from network import TOPOLOGIES, DEFAULT_PULSES, scaling_study
+
+
+def print_report(reports):
+    print(f"\n📊 {reports[0]['topology']} network, {reports[0]['rounds']} rounds")
+    print(f"{'nodes':>6} {'links':>6} {'demands':>8} {'link key b/s':>14} {'e2e key b/s':>13} "
+          f"{'e2e b/round':>12} {'satisfied':>10} {'aborted':>8} {'bit errors':>10} {'time s':>8}")
+    for report in reports:
+        print(f"{report['nodes']:>6} {report['links']:>6} {report['demands']:>8} "
+              f"{report['link_key_bits_per_s']:>14,.0f} {report['delivered_bits_per_s']:>13,.0f} "
+              f"{report['delivered_bits_per_round']:>12,.0f} {report['demand_satisfaction']:>10.1%} "
+              f"{report['aborted_link_rounds']:>8} {report['key_bit_errors']:>10,} {report['elapsed_s']:>8.2f}")
+
+    if len(reports) > 1:
+        first, last = reports[0], reports[-1]
+        node_ratio = last["nodes"] / first["nodes"]
+        link_ratio = last["link_key_bits_per_s"] / max(first["link_key_bits_per_s"], 1e-9)
+        e2e_ratio = last["delivered_bits_per_s"] / max(first["delivered_bits_per_s"], 1e-9)
+        round_ratio = last["delivered_bits_per_round"] / max(first["delivered_bits_per_round"], 1e-9)
+        print(f"\n📈 {node_ratio:.1f}x nodes -> {link_ratio:.2f}x link key throughput, "
+              f"{e2e_ratio:.2f}x end-to-end throughput ({round_ratio:.2f}x per round)")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="BB84 QKD trusted-relay network simulator")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="ring", help="network shape")
+    parser.add_argument("--nodes", default="4,8,16", help="comma-separated node counts to compare")
+    parser.add_argument("--rounds", type=int, default=5, help="key generation rounds per network")
+    parser.add_argument("--pulses", type=int, default=DEFAULT_PULSES, help="photons per link per round")
+    parser.add_argument("--loss", type=float, default=0.0, help="probability a photon is lost on a link")
+    parser.add_argument("--eve-prob", type=float, default=0.0, help="interception probability on tapped links")
+    parser.add_argument("--eve-fraction", type=float, default=0.0, help="fraction of links Eve taps")
+    parser.add_argument("--demand-bits", type=int, default=10_000, help="key bits each demand asks for per round")
+    parser.add_argument("--demands-per-node", type=float, default=1.0, help="random demands per node")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible runs")
+    parser.add_argument("--output", help="write the reports as JSON to this file")
+    args = parser.parse_args()
+
+    node_counts = [int(count) for count in args.nodes.split(",")]
+    print(f"🔗 Simulating {args.topology} networks with {', '.join(map(str, node_counts))} nodes...")
+    reports = asyncio.run(scaling_study(
+        args.topology, node_counts, args.rounds, args.demand_bits, args.demands_per_node, args.seed,
+        loss=args.loss, eve_prob=args.eve_prob, eve_fraction=args.eve_fraction, pulses=args.pulses))
+    print_report(reports)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n💾 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
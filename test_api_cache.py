@@ -0,0 +1,156 @@
+"""
+Tests for /session/status and seeded /simulate caching against the ASGI app
+Run with `python -m pytest test_api_cache.py`
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import httpx
+
+import main
+
+
+def run_with_client(scenario):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/session/reset")
+            return await scenario(client)
+    return asyncio.run(run())
+
+
+async def status_etag(client):
+    response = await client.get("/session/status")
+    assert response.status_code == 200
+    return response.headers["etag"]
+
+
+async def assert_not_modified(client, etag):
+    response = await client.get("/session/status", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+async def assert_changed(client, etag):
+    response = await client.get("/session/status", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    return response
+
+
+def test_status_returns_304_until_the_session_changes():
+    async def scenario(client):
+        etag = await status_etag(client)
+        await assert_not_modified(client, etag)
+        await assert_not_modified(client, etag)
+    run_with_client(scenario)
+
+
+def test_status_is_invalidated_by_every_handler():
+    bits, bases = [1, 0, 1, 1], [0, 1, 1, 0]
+
+    async def scenario(client):
+        etag = await status_etag(client)
+
+        await main.handle_alice_send_photons({"bits": bits, "bases": bases, "eve_prob": 0.0})
+        response = await assert_changed(client, etag)
+        assert response.json()["alice_data"]["bits"] == bits
+        etag = response.headers["etag"]
+        await assert_not_modified(client, etag)
+
+        await main.handle_eve_intercept({"bits": bits, "bases": bases})
+        etag = (await assert_changed(client, etag)).headers["etag"]
+
+        await main.handle_basis_comparison({"bob_bases": bases, "bob_measurements": bits})
+        response = await assert_changed(client, etag)
+        assert response.json()["alice_data"]["final_key"] == bits
+        etag = response.headers["etag"]
+
+        await main.handle_send_message({"sender": "alice", "content": "hi", "encrypted": False})
+        etag = (await assert_changed(client, etag)).headers["etag"]
+
+        await client.post("/session/reset")
+        response = await assert_changed(client, etag)
+        assert response.json()["alice_data"]["bits"] is None
+    run_with_client(scenario)
+
+
+def test_seeded_simulate_is_cached_per_parameters():
+    async def scenario(client):
+        path = "/simulate?n_bits=64&eve_prob=0.2&seed=7"
+        first = await client.get(path)
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+
+        again = await client.get(path)
+        assert again.content == first.content and again.headers["etag"] == etag
+
+        not_modified = await client.get(path, headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+
+        for other in ("/simulate?n_bits=64&eve_prob=0.2&seed=8",
+                      "/simulate?n_bits=64&eve_prob=0.2&seed=7&engine=numpy",
+                      "/simulate?n_bits=64&eve_prob=0.2&seed=7&packed=true"):
+            response = await client.get(other, headers={"If-None-Match": etag})
+            assert response.status_code == 200 and response.headers["etag"] != etag
+    run_with_client(scenario)
+
+
+def test_unseeded_simulate_is_not_cached():
+    async def scenario(client):
+        response = await client.get("/simulate?n_bits=16")
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+    run_with_client(scenario)
+
+
+def test_simulate_rejects_out_of_range_n_bits():
+    async def scenario(client):
+        for n_bits in (-1, main.MAX_SIMULATION_BITS + 1):
+            response = await client.get(f"/simulate?n_bits={n_bits}&seed=1")
+            assert response.status_code == 422
+        response = await client.get("/simulate?n_bits=0&seed=1")
+        assert response.status_code == 200 and response.json()["alice_bits"] == []
+    run_with_client(scenario)
+
+
+def test_rejected_first_block_leaves_the_session_untouched():
+    bits, bases = [1, 0, 1, 1], [0, 1, 1, 0]
+
+    async def scenario(client):
+        await main.handle_alice_send_photons({"bits": bits, "bases": bases, "eve_prob": 0.0})
+        etag = await status_etag(client)
+
+        for block in ({"seq": 0, "bits": [2], "bases": [0]},
+                      {"seq": 0, "bits": [1], "bases": [0], "eve_prob": "0.5"},
+                      {"seq": 0, "bits": [1], "bases": [0], "window": "4"}):
+            await main.handle_alice_send_block(block)
+            await assert_not_modified(client, etag)
+        assert main.session.transmission is None
+        assert main.session.alice_data.bits == bits
+
+        await main.handle_alice_send_block({"seq": 0, "bits": [1], "bases": [0], "eve_prob": 0.0})
+        response = await assert_changed(client, etag)
+        assert response.json()["alice_data"]["bits"] == [1]
+    run_with_client(scenario)
+
+
+def test_rejected_photons_leave_the_session_untouched():
+    bits, bases = [1, 0, 1, 1], [0, 1, 1, 0]
+
+    async def scenario(client):
+        await main.handle_alice_send_photons({"bits": bits, "bases": bases, "eve_prob": 0.0})
+        etag = await status_etag(client)
+
+        for data in ({"bits": [1, 2], "bases": [0, 1]},
+                     {"bits": [1, 0], "bases": [0]},
+                     {"bases": [0, 1]},
+                     {"bits": [1, 0], "bases": [0, 1], "eve_prob": "high"}):
+            await main.handle_alice_send_photons(data)
+            await assert_not_modified(client, etag)
+        assert main.session.alice_data.bits == bits
+    run_with_client(scenario)
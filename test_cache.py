@@ -0,0 +1,98 @@
+"""
+Tests for the response caches in backend/cache.py
+Run with `python -m pytest test_cache.py`
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from starlette.requests import Request
+
+from cache import CachedResponse, LRUByteCache, VersionedCache, etag_matches
+
+
+def make_request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_lru_evicts_least_recently_used_by_bytes():
+    cache = LRUByteCache(max_bytes=10)
+    cache.put("a", CachedResponse(b"aaaa"))
+    cache.put("b", CachedResponse(b"bbbb"))
+    assert cache.get("a") is not None  # "b" is now least recently used
+
+    cache.put("c", CachedResponse(b"cccc"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.current_bytes == 8
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_replacing_a_key_keeps_byte_count_exact():
+    cache = LRUByteCache(max_bytes=10)
+    cache.put("a", CachedResponse(b"aaaa"))
+    cache.put("a", CachedResponse(b"aaaaaaaa"))
+    assert cache.current_bytes == 8
+    assert len(cache.entries) == 1
+
+
+def test_lru_does_not_store_entries_larger_than_the_cache():
+    cache = LRUByteCache(max_bytes=4)
+    cache.put("small", CachedResponse(b"ab"))
+    value = cache.put("big", CachedResponse(b"too large"))
+    assert value.body == b"too large"
+    assert cache.get("big") is None
+    assert cache.get("small") is not None
+    assert cache.current_bytes == 2
+
+
+def test_lru_counts_hits_and_misses():
+    cache = LRUByteCache(max_bytes=100)
+    cache.get("missing")
+    cache.put("k", CachedResponse(b"{}"))
+    cache.get("k")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    cache.clear()
+    assert cache.stats()["entries"] == 0 and cache.current_bytes == 0
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches("", '"abc"')
+
+
+def test_cached_response_returns_304_for_matching_etag():
+    cached = CachedResponse(b'{"qber": 0.1}')
+    assert cached.etag == CachedResponse(b'{"qber": 0.1}').etag
+
+    response = cached.to_response(make_request(cached.etag))
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == cached.etag
+
+
+def test_cached_response_returns_body_for_stale_etag():
+    cached = CachedResponse(b'{"qber": 0.1}', etag='"session-2"')
+    for header in (None, '"session-1"'):
+        response = cached.to_response(make_request(header), cache_control="public, max-age=3600")
+        assert response.status_code == 200
+        assert response.body == b'{"qber": 0.1}'
+        assert response.headers["cache-control"] == "public, max-age=3600"
+
+
+def test_versioned_cache_only_serves_its_version():
+    cache = VersionedCache()
+    value = cache.put(3, CachedResponse(b"{}"))
+    assert cache.get(3) is value
+    assert cache.get(4) is None
+    cache.clear()
+    assert cache.get(3) is None
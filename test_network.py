@@ -0,0 +1,144 @@
+"""
+Tests for the trusted-relay network simulator in backend/network.py
+Run with `python -m pytest test_network.py`
+"""
+
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import numpy as np
+
+from network import (KeyBuffer, NetworkSimulator, Demand, allocate_by_demand, build_topology,
+                     link_id, relay_key, run_link_round)
+
+
+def random_links(count):
+    return [link_id(f"n{i}", f"n{i + 1}") for i in range(count)]
+
+
+def test_allocation_never_exceeds_link_key():
+    rng = np.random.default_rng(33)
+    for _ in range(200):
+        links = random_links(int(rng.integers(1, 6)))
+        available = {link: int(rng.integers(0, 5000)) for link in links}
+        n_demands = int(rng.integers(1, 8))
+        requests = {index: int(rng.integers(0, 4000)) for index in range(n_demands)}
+        paths = {}
+        for index in requests:
+            hops = rng.choice(len(links), size=int(rng.integers(1, len(links) + 1)), replace=False)
+            paths[index] = [links[hop] for hop in hops]
+
+        grants = allocate_by_demand(requests, paths, available)
+        for link in links:
+            used = sum(grant for index, grant in grants.items() if link in paths[index])
+            assert used <= available[link]
+        for index, grant in grants.items():
+            assert 0 <= grant <= requests[index]
+
+
+def test_allocation_is_demand_weighted_and_work_conserving():
+    ab, bc = link_id("a", "b"), link_id("b", "c")
+    grants = allocate_by_demand({0: 100, 1: 300, 2: 50}, {0: [ab], 1: [ab, bc], 2: [bc]},
+                                {ab: 200, bc: 1000})
+    # a-b is shared 1:3 by demand; demand 2 is fully served from the spare b-c key
+    assert grants == {0: 50, 1: 150, 2: 50}
+
+    # Enough key for everyone: every demand is met exactly
+    assert allocate_by_demand({0: 10, 1: 20}, {0: [ab], 1: [ab]}, {ab: 100}) == {0: 10, 1: 20}
+
+
+def test_allocation_skips_unroutable_and_empty_demands():
+    ab = link_id("a", "b")
+    grants = allocate_by_demand({0: 100, 1: 0, 2: 100}, {0: [ab], 1: [ab]}, {ab: 1000})
+    assert grants == {0: 100, 1: 0, 2: 0}
+    assert allocate_by_demand({0: 100}, {0: [ab]}, {ab: 0}) == {0: 0}
+
+
+def test_relay_key_delivers_the_source_key_and_consumes_every_hop():
+    rng = np.random.default_rng(1)
+    path = ["a", "b", "c", "d"]
+    buffers = {link_id(x, y): KeyBuffer() for x, y in zip(path, path[1:])}
+    for buffer in buffers.values():
+        buffer.deposit(rng.integers(0, 2, size=100, dtype=np.uint8))
+
+    sent, received = relay_key(buffers, path, 60, rng)
+    assert len(sent) == 60 and np.array_equal(sent, received)
+    assert all(buffer.available == 40 and buffer.consumed == 60 for buffer in buffers.values())
+
+    # A single hop is a plain one-time pad over the link key
+    sent, received = relay_key(buffers, ["a", "b"], 40, rng)
+    assert np.array_equal(sent, received)
+    assert buffers[link_id("a", "b")].available == 0
+
+
+def test_relay_key_carries_link_errors_to_the_destination():
+    rng = np.random.default_rng(2)
+    path = ["c", "b", "a"]  # walks both links against their link_id order
+    buffers = {link_id(x, y): KeyBuffer() for x, y in zip(path, path[1:])}
+    for link, flipped in ((link_id("b", "c"), [3]), (link_id("a", "b"), [3, 7])):
+        bits = rng.integers(0, 2, size=20, dtype=np.uint8)
+        peer_bits = bits.copy()
+        peer_bits[flipped] ^= 1
+        buffers[link].deposit(bits, peer_bits)
+
+    sent, received = relay_key(buffers, path, 20, rng)
+    # Position 3 is wrong on both links and cancels out
+    assert np.flatnonzero(sent != received).tolist() == [7]
+
+
+def test_key_buffer_drops_overflow_and_withdraws_in_order():
+    buffer = KeyBuffer(capacity=10)
+    buffer.deposit(np.arange(6, dtype=np.uint8))
+    buffer.deposit(np.arange(6, 12, dtype=np.uint8), np.arange(16, 22, dtype=np.uint8))
+    assert buffer.available == 10 and buffer.dropped == 2
+    assert buffer.withdraw(7).tolist() == [[0, 1, 2, 3, 4, 5, 6], [0, 1, 2, 3, 4, 5, 16]]
+    assert buffer.withdraw(3).tolist() == [[7, 8, 9], [17, 18, 19]]
+    try:
+        buffer.withdraw(1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("withdrawing from an empty buffer should fail")
+
+
+def test_shortest_path_avoids_unusable_links():
+    network = build_topology("ring", 6)
+    assert network.shortest_path("n0", "n2") == ["n0", "n1", "n2"]
+    blocked = link_id("n1", "n2")
+    assert network.shortest_path("n0", "n2", lambda link: link != blocked) == ["n0", "n5", "n4", "n3", "n2"]
+
+
+def test_tapped_link_rounds_are_aborted():
+    clean = run_link_round(20000, 0.5, 0.0, np.random.SeedSequence(1))
+    tapped = run_link_round(20000, 0.5, 1.0, np.random.SeedSequence(1))
+    assert clean["qber"] < 0.02 and len(clean["key"]) > 0
+    assert 0.33 < tapped["qber"] < 0.42 and len(tapped["key"]) == 0
+    assert np.array_equal(clean["key"], clean["peer_key"]) and len(tapped["peer_key"]) == 0
+
+    # Lightly tapped: under the threshold, so the round is kept with Bob's errors in it
+    leaky = run_link_round(20000, 0.5, 0.1, np.random.SeedSequence(1))
+    assert 0.0 < leaky["qber"] < 0.11
+    assert len(leaky["key"]) == len(leaky["peer_key"])
+    assert np.count_nonzero(leaky["key"] != leaky["peer_key"]) > 0
+
+
+def test_simulator_can_run_repeatedly():
+    network = build_topology("line", 4, pulses=2000, seed=1)
+    demands = [Demand("n0", "n3", 200)]
+
+    async def run_twice(simulator):
+        await simulator.run(1)
+        return await simulator.run(2)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        report = asyncio.run(run_twice(NetworkSimulator(network, demands, seed=1, executor=executor)))
+    assert report["rounds"] == 3 and report["delivered_bits"] == 600
+    assert report["key_bit_errors"] == 0
+
+    with NetworkSimulator(network, [Demand("n0", "n3", 200)], seed=1, workers=1) as simulator:
+        report = asyncio.run(run_twice(simulator))
+    assert report["rounds"] == 3
@@ -0,0 +1,88 @@
+"""
+Tests for the JSON encoders in backend/serialization.py
+Run with `python -m pytest test_serialization.py`
+"""
+
+import base64
+import json
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import numpy as np
+
+import serialization
+from serialization import PackedBits, SERIALIZERS, _encode_int_array
+
+
+def sample_arrays():
+    rng = np.random.default_rng(84)
+    wide = rng.integers(0, 2 ** 40, size=500, dtype=np.int64)
+    return {
+        "empty_uint8": np.zeros(0, dtype=np.uint8),
+        "empty_int64": np.zeros(0, dtype=np.int64),
+        "zeros": np.zeros(17, dtype=np.uint8),
+        "single_zero": np.array([0], dtype=np.int64),
+        "bits": rng.integers(0, 2, size=1000, dtype=np.uint8),
+        "digits": np.arange(10, dtype=np.uint8),
+        "nine_ten_boundary": np.array([9, 10, 0, 99, 100, 9, 1000, 10], dtype=np.int64),
+        "uint8_full_range": rng.integers(0, 256, size=1000, dtype=np.uint8),
+        "indices": np.flatnonzero(rng.integers(0, 2, size=5000)),
+        "wide_int64": wide,
+        "powers_of_ten": 10 ** np.arange(0, 18, dtype=np.int64),
+        "non_contiguous": rng.integers(0, 1000, size=2000, dtype=np.int64)[::3],
+        "non_contiguous_bits": rng.integers(0, 2, size=2000, dtype=np.uint8)[1::2],
+        "reversed": np.arange(0, 120, dtype=np.int64)[::-1],
+    }
+
+
+def test_int_array_encoder_matches_stdlib():
+    for name, arr in sample_arrays().items():
+        encoded = _encode_int_array(arr)
+        assert encoded is not None, name
+        assert json.loads(encoded) == json.loads(json.dumps(arr.tolist())), name
+        assert encoded == json.dumps(arr.tolist(), separators=(",", ":")).encode(), name
+
+
+def test_int_array_encoder_declines_negative_values():
+    assert _encode_int_array(np.array([3, -1, 2], dtype=np.int64)) is None
+    encoded = serialization.dumps_numpy({"values": np.array([3, -1, 2], dtype=np.int64)})
+    assert json.loads(encoded) == {"values": [3, -1, 2]}
+
+
+def test_every_backend_produces_the_same_document():
+    payload = dict(sample_arrays(), qber=0.125, eve_intercepted=True,
+                   timestamp=datetime(2024, 1, 2, 3, 4, 5), nested={"k": [1, 2]})
+    expected = json.loads(json.dumps({
+        key: value.tolist() if isinstance(value, np.ndarray) else
+        value.isoformat() if isinstance(value, datetime) else value
+        for key, value in payload.items()
+    }))
+    for name, dumps in SERIALIZERS.items():
+        assert json.loads(dumps(payload)) == expected, name
+
+
+def check_packed_bits(bits):
+    encoded = PackedBits(bits).to_json()
+    assert encoded["length"] == len(bits)
+    expected = np.packbits(np.asarray(bits, dtype=np.uint8)).tobytes()
+    assert base64.b64decode(encoded["packed"]) == expected
+
+
+def test_packed_bits_numpy_path():
+    rng = np.random.default_rng(1)
+    for n in (0, 1, 7, 8, 9, 1001):
+        check_packed_bits(rng.integers(0, 2, size=n, dtype=np.uint8))
+
+
+def test_packed_bits_table_fallback_matches_packbits():
+    rng = np.random.default_rng(2)
+    numpy_loaded = serialization._numpy_loaded
+    serialization._numpy_loaded = lambda: False
+    try:
+        for n in (0, 1, 7, 8, 9, 16, 1001):
+            check_packed_bits(rng.integers(0, 2, size=n).tolist())
+    finally:
+        serialization._numpy_loaded = numpy_loaded
@@ -0,0 +1,123 @@
+"""
+Tests for the shared-memory buffers and worker pool in backend/shared_buffers.py
+Run with `python -m pytest test_shared_buffers.py`
+"""
+
+import asyncio
+import gc
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import numpy as np
+
+import shared_buffers
+from shared_buffers import ProtocolWorkerPool, SharedBufferManager
+
+
+def expect_error(fn, error):
+    try:
+        fn()
+    except error as e:
+        return e
+    raise AssertionError(f"{error.__name__} not raised")
+
+
+def test_buffers_are_reference_counted():
+    manager = SharedBufferManager()
+    handle = manager.allocate("job", "bits", 16)
+    assert manager.refcounts[handle.name] == 1
+
+    # Reallocating a large enough buffer reuses the segment
+    assert manager.allocate("job", "bits", 8).name == handle.name
+    assert manager.stats() == {"owners": 1, "segments": 1, "bytes": manager.segments[handle.name].size}
+
+    manager.acquire(handle)
+    manager.release_owner("job")
+    assert manager.refcounts[handle.name] == 1 and manager.stats()["owners"] == 0
+    manager.release(handle)
+    assert manager.stats()["segments"] == 0 and handle.name not in manager.refcounts
+
+    # Releasing twice is a no-op
+    manager.release(handle)
+
+
+def test_held_buffers_cannot_be_reallocated():
+    manager = SharedBufferManager()
+    handles = {"bits": manager.allocate("job", "bits", 16)}
+    with manager.hold(handles):
+        expect_error(lambda: manager.allocate("job", "bits", 32), RuntimeError)
+        expect_error(lambda: manager.allocate("job", "bits", 8), RuntimeError)
+    assert manager.allocate("job", "bits", 32).length == 32
+    manager.close()
+    assert manager.stats() == {"owners": 0, "segments": 0, "bytes": 0}
+
+
+def test_hold_outlives_release_owner():
+    manager = SharedBufferManager()
+    handle = manager.allocate("job", "bits", 4)
+    with manager.hold({"bits": handle}):
+        manager.release_owner("job")
+        manager.array(handle)[:] = [1, 0, 1, 1]
+        assert manager.stats()["segments"] == 1
+    assert manager.stats()["segments"] == 0
+
+
+def test_segment_is_closed_after_the_last_view_is_collected():
+    manager = SharedBufferManager()
+    handle = manager.allocate("job", "bits", 4)
+    segment = manager.segments[handle.name]
+    view = manager.array(handle)
+    view[:] = [1, 0, 1, 1]
+    tail = view[2:]
+
+    manager.release_owner("job")
+    assert manager.stats()["segments"] == 0
+    # Still mapped: reading through the views must not crash
+    assert view.tolist() == [1, 0, 1, 1] and tail.tolist() == [1, 1]
+    assert segment.buf is not None
+
+    del view
+    gc.collect()
+    assert segment.buf is not None  # the slice keeps its base alive
+    del tail
+    gc.collect()
+    assert segment.buf is None
+
+
+def simulate(pool, owner, n_bits, eve_prob, seed):
+    async def run():
+        result = await pool.simulate(owner, n_bits, eve_prob, seed)
+        # Copy out of the buffers before they are released
+        return {key: value.copy() if isinstance(value, np.ndarray) else value
+                for key, value in result.items()}
+    try:
+        return asyncio.run(run())
+    finally:
+        pool.release_owner(owner)
+
+
+def test_seeded_runs_do_not_depend_on_the_pool_size():
+    chunk_size = shared_buffers.CHUNK_SIZE
+    shared_buffers.CHUNK_SIZE = 1000
+    pools = [ProtocolWorkerPool(workers=1), ProtocolWorkerPool(workers=2)]
+    try:
+        one, two = (simulate(pool, "job", 4500, 0.3, seed=5) for pool in pools)
+        for key, value in one.items():
+            if isinstance(value, np.ndarray):
+                assert np.array_equal(value, two[key]), key
+            else:
+                assert value == two[key], key
+        assert 0.0 < one["qber"] < 0.5
+        assert np.array_equal(one["matched_indices"], np.flatnonzero(one["alice_bases"] == one["bob_bases"]))
+
+        clean = simulate(pools[1], "clean", 4500, 0.0, seed=5)
+        assert clean["qber"] == 0.0 and np.array_equal(clean["alice_sifted"], clean["bob_sifted"])
+
+        for pool in pools:
+            assert pool.buffers.stats() == {"owners": 0, "segments": 0, "bytes": 0}
+    finally:
+        shared_buffers.CHUNK_SIZE = chunk_size
+        for pool in pools:
+            pool.close()
@@ -0,0 +1,143 @@
+"""
+Tests for the startup helpers in backend/startup.py and the table-driven protocol code
+Run with `python -m pytest test_startup.py`
+"""
+
+import base64
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import numpy as np
+
+import startup
+from startup import LazyModule, ProtocolTables, import_timer, lazy_import
+from main import BB84Protocol
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def with_fake_clock(fn):
+    clock = FakeClock()
+    perf_counter = startup.time.perf_counter
+    startup.time.perf_counter = clock
+    try:
+        fn(clock)
+    finally:
+        startup.time.perf_counter = perf_counter
+
+
+def test_import_timer_records_leaf_time_only():
+    def scenario(clock):
+        with import_timer("test_outer"):
+            clock.now += 1.0
+            with import_timer("test_inner"):
+                clock.now += 2.0
+                with import_timer("test_leaf"):
+                    clock.now += 4.0
+            clock.now += 0.5
+        with import_timer("test_inner"):
+            clock.now += 3.0
+
+    with_fake_clock(scenario)
+    timings = {label: startup.import_timings.pop(label)
+               for label in ("test_outer", "test_inner", "test_leaf")}
+    assert timings == {"test_outer": 1.5, "test_inner": 5.0, "test_leaf": 4.0}
+    assert startup._nested_timings == []
+
+
+def test_lazy_module_imports_on_first_attribute_access():
+    module = LazyModule("colorsys")
+    assert not module.loaded
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert module.loaded
+
+
+def test_only_loads_after_boot_are_reported_as_deferred():
+    boot_finished = startup._boot_finished
+    startup.deferred_timings.pop("colorsys", None)
+    try:
+        startup._boot_finished = None
+        LazyModule("colorsys")._load()
+        assert "colorsys" not in startup.deferred_timings
+
+        startup.mark_ready()
+        LazyModule("colorsys")._load()
+        assert startup.deferred_timings.pop("colorsys") >= 0.0
+    finally:
+        startup._boot_finished = boot_finished
+
+
+def test_lazy_import_modes():
+    mode = startup.STARTUP_MODE
+    try:
+        startup.STARTUP_MODE = "lazy"
+        lazy = lazy_import("fractions")
+        assert not lazy.loaded and lazy_import("fractions") is lazy
+
+        startup.STARTUP_MODE = "eager"
+        eager = lazy_import("calendar")
+        assert eager.loaded and "calendar" in startup.import_timings
+        assert startup.startup_report()["deferred"]["calendar"] is True
+    finally:
+        startup.STARTUP_MODE = mode
+        for name in ("fractions", "calendar"):
+            startup._lazy_modules.pop(name, None)
+        startup.import_timings.pop("calendar", None)
+
+
+def test_protocol_tables_match_the_branching_implementation():
+    tables = ProtocolTables()
+    for basis in (0, 1):
+        for bit in (0, 1):
+            assert tables.encode[basis][bit] == (bit if basis == 0 else bit + 2)
+        for photon in range(4):
+            correct = photon in (0, 1) if basis == 0 else photon in (2, 3)
+            assert tables.measure[basis][photon] == (photon % 2 if correct else -1)
+
+    for byte in range(256):
+        bits = [(byte >> i) & 1 for i in range(8)]
+        assert tables.pack_lsb[tuple(bits)] == sum(bit << i for i, bit in enumerate(bits))
+        msb_first = tuple(int(b) for b in np.unpackbits(np.array([byte], dtype=np.uint8)))
+        assert tables.pack_msb[msb_first] == byte
+
+
+def reference_otp(data: bytes, key):
+    # Byte-at-a-time loop the table-driven OTP replaced
+    out = bytearray()
+    key_index = 0
+    for byte in data:
+        key_byte = 0
+        for bit_pos in range(8):
+            if key_index >= len(key):
+                key_index = 0
+            key_byte |= key[key_index] << bit_pos
+            key_index += 1
+        out.append(byte ^ key_byte)
+    return bytes(out)
+
+
+def test_otp_output_is_unchanged():
+    # Pinned: key byte 0b01001101 XORed into "hi"
+    assert BB84Protocol.encrypt_message_otp("hi", [1, 0, 1, 1, 0, 0, 1, 0]) == "JSQ="
+    assert BB84Protocol.decrypt_message_otp("JSQ=", [1, 0, 1, 1, 0, 0, 1, 0]) == "hi"
+
+    rng = random.Random(31)
+    messages = ["", "a", "hello quantum world", "ünïcødé ✓ " * 7, "x" * 1000]
+    for message in messages:
+        for key_length in (1, 3, 7, 8, 9, 12, 16, 64, 101):
+            key = [rng.randint(0, 1) for _ in range(key_length)]
+            expected = base64.b64encode(reference_otp(message.encode('utf-8'), key)).decode('utf-8')
+            encrypted = BB84Protocol.encrypt_message_otp(message, key)
+            assert encrypted == expected, (message, key)
+            assert BB84Protocol.decrypt_message_otp(encrypted, key) == message
+
+    assert BB84Protocol.encrypt_message_otp("plain", []) == "plain"
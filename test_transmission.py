@@ -0,0 +1,146 @@
+"""
+Tests for block-based photon transmission in backend/transmission.py
+Run with `python -m pytest test_transmission.py`
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from transmission import BlockTransmission, DuplicateBlockError, TransmissionError, check_photons
+
+
+def block(n=4):
+    return [1, 0] * (n // 2), [0, 1] * (n // 2)
+
+
+def expect_error(fn, error=TransmissionError):
+    try:
+        fn()
+    except error as e:
+        return e
+    raise AssertionError(f"{error.__name__} not raised")
+
+
+def test_out_of_order_blocks_wait_for_the_gap():
+    transmission = BlockTransmission()
+    assert transmission.accept(2, *block(), 0.0) == []
+    assert transmission.accept(1, *block(), 0.0) == []
+    assert transmission.buffered == 2 and transmission.next_seq == 0
+
+    accepted = transmission.accept(0, *block(), 0.0)
+    assert [b.seq for b in accepted] == [0, 1, 2]
+    assert [b.offset for b in accepted] == [0, 4, 8]
+    assert transmission.next_seq == 3 and not transmission.out_of_order
+
+
+def test_duplicates_and_stale_blocks_are_reported():
+    transmission = BlockTransmission()
+    transmission.accept(0, *block(), 0.0)
+    transmission.accept(2, *block(), 0.0)
+    expect_error(lambda: transmission.accept(0, *block(), 0.0), DuplicateBlockError)
+    expect_error(lambda: transmission.accept(2, *block(), 0.0), DuplicateBlockError)
+
+    # Still a duplicate once the block has been delivered and acknowledged
+    transmission.release()
+    transmission.acknowledge(0, *block())
+    expect_error(lambda: transmission.accept(0, *block(), 0.0), DuplicateBlockError)
+
+
+def test_invalid_blocks_are_rejected():
+    transmission = BlockTransmission(max_block_size=8)
+    for seq, bits, bases in (
+        ("x", *block()),
+        (-1, *block()),
+        (True, *block()),
+        (None, *block()),
+        (0, [], []),
+        (0, *block(10)),
+        (0, [0, 1, 0], [0, 1]),
+        (0, [0, 2], [0, 1]),
+        (0, "0101", "0101"),
+    ):
+        error = expect_error(lambda: transmission.accept(seq, bits, bases, 0.0))
+        assert not isinstance(error, DuplicateBlockError)
+    assert transmission.next_seq == 0 and transmission.buffered == 0
+
+
+def test_window_limits_blocks_in_flight():
+    transmission = BlockTransmission(window=2)
+    for seq in range(5):
+        transmission.accept(seq, *block(), 0.0)
+    assert [b.seq for b in transmission.release()] == [0, 1]
+    assert transmission.release() == []
+
+    transmission.acknowledge(0, *block())
+    assert [b.seq for b in transmission.release()] == [2]
+    assert sorted(transmission.in_flight) == [1, 2]
+    assert [b.seq for b in transmission.pending] == [3, 4]
+
+
+def test_buffer_full_rejects_new_blocks():
+    transmission = BlockTransmission(max_pending=2)
+    transmission.accept(0, *block(), 0.0)
+    transmission.accept(1, *block(), 0.0)
+    assert transmission.capacity == 0
+    error = expect_error(lambda: transmission.accept(2, *block(), 0.0))
+    assert "full" in str(error)
+
+
+def test_bad_acknowledgements_are_rejected():
+    transmission = BlockTransmission()
+    transmission.accept(0, *block(4), 0.0)
+    transmission.release()
+    bits, bases = block(4)
+    for seq, bob_bases, measurements in (
+        (1, bases, bits),             # not in flight
+        ("0", bases, bits),           # wrong type
+        (0, bases[:2], bits),         # short bases
+        (0, bases, bits[:2]),         # short measurements
+        (0, bases + [0], bits + [0]),  # too long
+        (0, [0, 1, 2, 0], bits),      # not a basis
+        (0, None, bits),
+    ):
+        expect_error(lambda: transmission.acknowledge(seq, bob_bases, measurements))
+    assert 0 in transmission.in_flight and transmission.acked_blocks == 0
+
+    assert transmission.acknowledge(0, bases, bits).seq == 0
+    expect_error(lambda: transmission.acknowledge(0, bases, bits))
+
+
+def test_running_qber():
+    transmission = BlockTransmission()
+    assert transmission.qber == 0.0
+    assert transmission.record_sift(10, 1) == 0.1
+    assert transmission.record_sift(30, 7) == 0.2
+    assert transmission.record_sift(0, 0) == 0.2
+
+
+def test_window_must_be_a_bounded_integer():
+    for window in (0, -1, 65, "4", None, 2.0, True):
+        expect_error(lambda: BlockTransmission(window=window))
+    assert BlockTransmission(window=64).window == 64
+
+
+def test_eve_prob_must_be_a_probability():
+    transmission = BlockTransmission()
+    for eve_prob in ("0.5", None, -0.1, 1.5, float("nan"), True):
+        expect_error(lambda: transmission.accept(0, *block(), eve_prob))
+    assert transmission.buffered == 0 and transmission.release() == []
+    assert transmission.accept(0, *block(), 1)[0].eve_prob == 1.0
+
+
+def test_whole_key_photons_are_validated():
+    for bits, bases, eve_prob in (
+        (None, [0, 1], 0.2),
+        ("01", "01", 0.2),
+        ([0, 2], [0, 1], 0.2),
+        ([0, 1], [0, 1, 1], 0.2),
+        ([0, 1], [0, 3], 0.2),
+        ([0, 1], None, 0.2),
+        ([0, 1], [0, 1], "0.2"),
+        ([0, 1], [0, 1], 2),
+    ):
+        expect_error(lambda: check_photons(bits, bases, eve_prob))
+    assert check_photons([1, 0], [0, 1], 0) == 0.0